@@ -1,10 +1,23 @@
 # -*- coding: utf-8 -*-
+import time
+STARTUP_T0 = time.perf_counter()  # Referencia para medir o tempo de inicializacao
 import sys
 import math
+import heapq
 import random
 import pygame
+import numpy as np  # Ja vem com o Pygame Zero
 import os
+import json
+import struct
+import hashlib
+import zlib
+import queue
+import atexit
+import threading
+import weakref
 from pgzero.rect import Rect
+from pgzero.screen import Screen
 
 def resource_path(relative_path):
     if hasattr(sys, '_MEIPASS'):
@@ -21,6 +34,7 @@ TITLE = "Elden Thing"
 
 # Constantes do jogo
 GRAVITY = 0.8
+MAX_FALL_SPEED = 18  # Velocidade terminal de queda (pixels por tick)
 JUMP_STRENGTH = -15
 PLAYER_SPEED = 5
 ENEMY_SPEED = 2
@@ -29,11 +43,134 @@ ANIMATION_SPEED = 0.15
 SPRITE_SCALE = 0.35  # Escala dos sprites (35% do tamanho original - menores e mais responsivos)
 ATTACK_RANGE = 80  # Alcance do ataque (aumentado para ser mais facil acertar)
 ATTACK_DURATION = 0.3  # Duracao da animacao de ataque
+PLATFORM_GRID_CELL = 64  # Largura das colunas da grade espacial de plataformas
+AI_LOD_MARGIN = 60  # Inimigos mais longe que isso fora da tela tem a IA atualizada em rodizio
+AI_LOD_BUCKETS = 4  # Inimigos distantes rodam um tick a cada AI_LOD_BUCKETS
+NAV_JUMP_CLEARANCE = 10  # Folga acima da plataforma de destino no pulo das IAs
+NAV_JUMP_HEIGHT = JUMP_STRENGTH ** 2 / (2 * GRAVITY) - NAV_JUMP_CLEARANCE  # Subida maxima de uma ligacao
+NAV_JUMP_REACH = 150  # Vao horizontal maximo de um pulo entre plataformas
+NAV_EDGE_MARGIN = 8  # Distancia da borda para pular ou cair
 COLLECTIBLES_NEEDED = 3  # Quantos coletaveis sao necessarios para abrir a saida
+BOSS_MAX_HEALTH = 100  # Vida do boss
+BOSS_ATTACK_COOLDOWN = 2.0  # Segundos entre ataques do boss
+BOSS_SCRIPT = "bosses/rei_esqueleto.json"  # Comportamento do boss (fases e ataques)
+BOSS_REINFORCEMENTS = 2  # Cacadores que o boss chama nas plataformas altas
+BOSS_REINFORCEMENT_HEALTH = 0.5  # Fracao da vida do boss em que os cacadores aparecem
+PROJECTILE_CAPACITY = 4096  # Projeteis simultaneos no pool
+PLAYER_SHOT_SPEED = 9  # Velocidade do tiro do jogador (pixels por tick)
+PLAYER_SHOT_COOLDOWN = 0.4  # Segundos entre tiros do jogador
+PLAYER_SHOT_DAMAGE = 5  # Dano do tiro no boss (inimigos comuns morrem com um)
+PARTICLE_BUDGET = 2048  # Particulas simultaneas (as excedentes sao descartadas)
+REWIND_SECONDS = 10  # Quanto tempo da para voltar segurando R
+REWIND_ARENA_BYTES = 4 * 1024 * 1024  # Memoria fixa do historico de rewind
+
+# Estados de animacao e personagens (indices das tabelas de frames)
+ANIM_IDLE, ANIM_WALK, ANIM_ATTACK, ANIM_HIT = range(4)
+CHAR_HERO, CHAR_ENEMY, CHAR_BOSS = range(3)
+TEAM_PLAYER, TEAM_ENEMY = range(2)  # Lados dos projeteis
+
+# Particulas: tipo -> (cor, raio, gravidade por tick, segundos de vida)
+PARTICLE_SPARK, PARTICLE_BONE, PARTICLE_DUST, PARTICLE_BLOOD = range(4)
+PARTICLE_KINDS = {
+    PARTICLE_SPARK: ((255, 240, 150), 2, 0.05, 0.35),
+    PARTICLE_BONE: ((230, 220, 190), 3, 0.35, 0.9),
+    PARTICLE_DUST: ((170, 150, 120), 3, -0.02, 0.5),
+    PARTICLE_BLOOD: ((200, 30, 30), 3, 0.3, 0.7),
+}
+IMPACT_MAX_SIZE = 150  # Tamanho maximo do sprite de impacto
+
+# Animacoes: personagem -> estado -> (sprites, segundos por frame)
+# Estados ausentes usam a caminhada ou o parado no lugar
+ANIMATIONS = {
+    CHAR_HERO: {
+        ANIM_IDLE: (("hero_paused",), ANIMATION_SPEED),
+        ANIM_WALK: (("hero_walk_01", "hero_walk_02"), ANIMATION_SPEED),
+        ANIM_ATTACK: (("hero_attack_02",), ATTACK_DURATION),
+        ANIM_HIT: (("hero_paused",), 0.2),
+    },
+    CHAR_ENEMY: {
+        ANIM_IDLE: (("enemy_paused",), ANIMATION_SPEED),
+        ANIM_WALK: (("enemy_walk_01", "enemy_walk_02"), ANIMATION_SPEED),
+    },
+    CHAR_BOSS: {
+        ANIM_IDLE: (("enemy_paused",), ANIMATION_SPEED),
+        ANIM_WALK: (("enemy_walk_01", "enemy_walk_02"), ANIMATION_SPEED),
+        ANIM_ATTACK: (("enemy_attack_01",), 0.3),
+    },
+}
+
+INVINCIBLE_BLINK_ALPHA = 70  # Transparencia do jogador nas piscadas de invencibilidade
+
+# Modo de medicao de inicializacao (ELDEN_STARTUP_PROFILE=1 imprime os tempos)
+STARTUP_PROFILE = os.environ.get("ELDEN_STARTUP_PROFILE", "") not in ("", "0")
+
+# Cache em disco dos sprites ja processados (ELDEN_SPRITE_CACHE=0 desliga)
+SPRITE_CACHE_ENABLED = os.environ.get("ELDEN_SPRITE_CACHE", "1") != "0"
+SPRITE_CACHE_DIR = os.environ.get(
+    "ELDEN_CACHE_DIR",
+    os.path.join(os.path.expanduser("~"), ".cache", "elden_thing", "sprites")
+)
+SPRITE_CACHE_VERSION = 1  # Mudar quando o formato ou o processamento mudar
+
+# Bot controlando o jogador na janela (ELDEN_BOT=scripted ou random), reinicia sozinho
+BOT_POLICY = os.environ.get("ELDEN_BOT", "")
+
+# Retomada rapida: ELDEN_RESUME_FILE=arquivo salva a partida periodicamente e a
+# retoma ao abrir o jogo (fliperamas que sao desligados no meio da partida)
+RESUME_PATH = os.environ.get("ELDEN_RESUME_FILE", "")
+RESUME_INTERVAL = 1.0  # Segundos entre salvamentos
+
+# Telemetria: ELDEN_TELEMETRY=arquivo.jsonl grava os eventos de cada frame
+TELEMETRY_PATH = os.environ.get("ELDEN_TELEMETRY", "")
+
+# Resolucao interna: ELDEN_RENDER_SCALE=0.5 desenha o mundo em 400x300 e amplia
+# uma vez por frame para a tela (ELDEN_SMOOTH_SCALE=1 suaviza em vez de pixels
+# duros). A janela e redimensionavel e F11 (ou ELDEN_FULLSCREEN=1) alterna a
+# tela cheia; a ampliacao final para a janela e feita pelo SDL.
+RENDER_SCALE = min(1.0, max(0.25, float(os.environ.get("ELDEN_RENDER_SCALE", "1"))))
+SMOOTH_SCALE = os.environ.get("ELDEN_SMOOTH_SCALE", "0") == "1"
+FULLSCREEN = os.environ.get("ELDEN_FULLSCREEN", "0") == "1"
+
+# Ociosidade: em telas paradas (menu, instrucoes, fim de jogo) o loop espera
+# por entrada ate IDLE_WAIT segundos e so redesenha quando algo muda; pausado
+# (P ou janela sem foco) roda a 1 / PAUSED_WAIT ticks por segundo
+IDLE_WAIT = 0.5
+PAUSED_WAIT = 0.1
+
+# Qualidade visual: ELDEN_QUALITY=auto ajusta sozinho pelo tempo de frame;
+# um numero fixa o nivel (0 = tudo ligado, ver QUALITY_LEVELS)
+QUALITY = os.environ.get("ELDEN_QUALITY", "auto")
+# Niveis do mais bonito ao mais leve: (nuvens, portal detalhado, fracao do
+# orcamento de particulas, escala maxima da resolucao interna). Cada nivel
+# muda uma coisa so em relacao ao anterior
+QUALITY_LEVELS = (
+    (True, True, 1.0, 1.0),
+    (False, True, 1.0, 1.0),
+    (False, False, 1.0, 1.0),
+    (False, False, 0.5, 1.0),
+    (False, False, 0.5, 0.75),
+    (False, False, 0.25, 0.75),
+    (False, False, 0.25, 0.5),
+)
+
+# Gravacao de video: ELDEN_RECORD=partida.etv (stream de frames) ou frames.png
+# (sequencia de PNGs), reduzida por ELDEN_RECORD_SCALE
+RECORD_PATH = os.environ.get("ELDEN_RECORD", "")
+RECORD_SCALE = float(os.environ.get("ELDEN_RECORD_SCALE", "0.5"))
+
+# Efeitos sonoros: nome -> (vozes simultaneas, volume, roubar voz mais antiga quando cheio)
+SOUND_EFFECTS = {
+    "jump": (1, 0.6, True),
+    "slash_sound": (3, 0.8, True),
+    "hurt": (2, 0.7, False),
+}
+SOUND_DIRS = ("sounds", "music")  # Pastas procuradas, em ordem
+SOUND_EXTENSIONS = (".ogg", ".wav")
 
 
 class GameState:
     """Estados do jogo."""
+    LOADING = "loading"
     MENU = "menu"
     INSTRUCTIONS = "instructions"
     PLAYING = "playing"
@@ -42,40 +179,519 @@ class GameState:
     VICTORY = "victory"
 
 
-class AnimatedSprite:
-    """Classe base para sprites animados."""
+class GameEvent:
+    """Tipos de evento da partida, enviados ao EventBus como (tipo, x, y, valor)."""
+    JUMP = "jump"  # Jogador pulou
+    LAND = "land"  # Jogador tocou o chao
+    SHOT = "shot"  # Jogador atirou
+    SLASH = "slash"  # Golpe de espada acertou (valor = jogador virado para a direita)
+    HIT = "hit"  # Boss recebeu dano (valor = dano)
+    DEATH = "death"  # Inimigo morreu (valor = eid)
+    DAMAGE = "damage"  # Jogador perdeu uma vida
+    WAVE_CLEARED = "wave_cleared"  # Todas as ondas vencidas (valor = numero de ondas)
+
+
+class World:
+    """Componentes das entidades guardados em arrays paralelos (estilo ECS).
     
-    def __init__(self, x, y, animation_speed=ANIMATION_SPEED):
-        self.x = x
-        self.y = y
-        self.animation_speed = animation_speed
-        self.current_frame = 0
-        self.animation_timer = 0
-        self.facing_right = True
-        self.velocity_x = 0
-        self.velocity_y = 0
+    Cada entidade e um indice nos arrays de componentes. Os sistemas rodam em
+    ordem fixa e cada um percorre so as entidades registradas nele.
+    """
+    
+    # Coluna -> valor padrao
+    COLUMNS = {
+        # Posicao e velocidade
+        "x": 0.0,
+        "y": 0.0,
+        "vx": 0.0,
+        "vy": 0.0,
+        "facing": True,
+        # Hitbox
+        "hit_w": 0.0,
+        "hit_h": 0.0,
+        "alive": True,
+        # Animacao (indices nas tabelas de ANIMATIONS, tempo em ticks)
+        "anim_kind": CHAR_HERO,
+        "anim_state": ANIM_IDLE,
+        "anim_tick": 0,
+        "attacking": False,
+        # Efeito de hit
+        "hit_active": False,
+        "hit_timer": 0.0,
+        # Patrulha
+        "patrol_left": 0.0,
+        "patrol_right": 0.0,
+        "patrol_speed": 0.0,
+        # IA de perseguicao
+        "chase_speed": 0.0,
+        "chase_stop": 0.0,
+        "attack_range": 0.0,
+        "attack_cooldown": 0.0,
+        "attack_delay": 0.0,
+        "chase_active": True,
+        # Nivel de detalhe (relogio do World na ultima vez que a entidade rodou)
+        "lod_time": 0.0,
+        # Navegacao entre plataformas (ver NavGraph); foot vai do centro ate os pes
+        "grounded": True,
+        "nav_node": -1,
+        "foot": 0.0,
+        "goal_x": 0.0,
+        "waypoint": False,
+        # Script de comportamento (BossScript, fase, passo, ticks no passo)
+        "script": None,
+        "script_phase": 0,
+        "script_step": 0,
+        "script_clock": 0,
+        "script_health": -1,
+        "telegraph": False,
+        # Vida
+        "health": 0,
+        "max_health": 0,
+        # Limites de tela
+        "min_x": 0.0,
+        "max_x": 0.0,
+        "min_y": 0.0,
+        "max_y": 0.0,
+    }
+    
+    # Ordem em que os sistemas rodam a cada tick
+    SYSTEMS = ("lod", "patrol", "script", "nav", "chase", "clamp", "hit_effect", "animation")
+    # Marcas sem sistema, so para consultas (select, overlapping)
+    TAGS = ("enemy",)
+    
+    def __init__(self):
+        for name in self.COLUMNS:
+            setattr(self, name, [])
+        self.size = 0
+        self.free_ids = []
+        # Entidades de cada sistema (dict usado como conjunto ordenado)
+        self.members = {name: {} for name in self.SYSTEMS + self.TAGS}
+        self.projectiles = None  # Destino dos projeteis disparados pelos scripts
+        self.events = None  # EventBus que recebe os eventos dos sistemas
+        # Nivel de detalhe (ver lod_system): quem roda todo tick e os baldes do rodizio
+        self.lod_clock = 0.0
+        self.lod_tick = 0
+        self.lod_buckets = [{} for _ in range(AI_LOD_BUCKETS)]
+        self.lod_near = {}
+        self.steady = {}  # Entidades fora do sistema "lod"
+        self.near = None  # Entidades que rodaram no ultimo tick (None = todas)
+        self.nav = None  # NavGraph do nivel atual
+        self.target_node = None  # Ultimo no de navegacao onde o alvo pisou
+    
+    def spawn(self, systems, **values):
+        """Cria uma entidade com os componentes dados e a registra nos sistemas."""
+        if self.free_ids:
+            eid = self.free_ids.pop()
+            for name, default in self.COLUMNS.items():
+                getattr(self, name)[eid] = values.get(name, default)
+        else:
+            eid = self.size
+            self.size += 1
+            for name, default in self.COLUMNS.items():
+                getattr(self, name).append(values.get(name, default))
+        for name in systems:
+            self.members[name][eid] = None
+        if "lod" in systems:
+            # Roda no primeiro tick, que decide se fica perto ou entra no rodizio
+            self.lod_time[eid] = self.lod_clock
+            self.lod_buckets[eid % len(self.lod_buckets)][eid] = None
+            self.lod_near[eid] = None
+        else:
+            self.steady[eid] = None
+        return eid
+    
+    def destroy(self, eid):
+        """Remove a entidade de todos os sistemas e libera o indice."""
+        self.alive[eid] = False
+        for members in self.members.values():
+            members.pop(eid, None)
+        self.lod_buckets[eid % len(self.lod_buckets)].pop(eid, None)
+        self.lod_near.pop(eid, None)
+        self.steady.pop(eid, None)
+        self.free_ids.append(eid)
+    
+    def select(self, system, ids):
+        """Entidades vivas de um sistema, opcionalmente restritas a ids."""
+        members = self.members[system]
+        if not members:
+            return ()
+        alive = self.alive
+        if ids is None:
+            return [eid for eid in members if alive[eid]]
+        return [eid for eid in ids if eid in members and alive[eid]]
+    
+    def rect(self, eid):
+        """Retangulo de colisao da entidade."""
+        width = self.hit_w[eid]
+        height = self.hit_h[eid]
+        return Rect(self.x[eid] - width // 2, self.y[eid] - height // 2, width, height)
+    
+    def overlapping(self, system, rect, ids=None):
+        """Entidades vivas de um sistema cujo retangulo de colisao encosta em rect."""
+        left, top, right, bottom = rect.left, rect.top, rect.right, rect.bottom
+        x, y, hit_w, hit_h = self.x, self.y, self.hit_w, self.hit_h
+        found = []
+        for eid in self.select(system, ids):
+            entity_left = x[eid] - hit_w[eid] // 2
+            entity_top = y[eid] - hit_h[eid] // 2
+            if (entity_left < right and entity_left + hit_w[eid] > left and
+                    entity_top < bottom and entity_top + hit_h[eid] > top):
+                found.append(eid)
+        return found
+    
+    def run(self, dt, target=None, ids=None):
+        """Roda todos os sistemas em ordem (ids restringe a algumas entidades).
+        
+        Sem ids e com alvo, so roda quem o nivel de detalhe escolher para este
+        tick (ver lod_system), cada grupo com o seu dt.
+        """
+        if ids is None and target is not None and self.members["lod"]:
+            for step, group in self.lod_system(dt).items():
+                self.run_systems(step, target, group)
+        else:
+            if ids is None:
+                self.near = None
+            self.run_systems(dt, target, ids)
+    
+    def run_systems(self, dt, target, ids):
+        """Roda a sequencia de sistemas com um mesmo dt."""
+        self.patrol_system(dt, ids)
+        self.script_system(dt, target, ids)
+        self.nav_system(dt, target, ids)
+        self.chase_system(dt, target, ids)
+        self.clamp_system(ids)
+        self.hit_effect_system(dt, ids)
+        self.animation_system(dt, ids)
+    
+    def lod_system(self, dt):
+        """Nivel de detalhe: decide quem roda neste tick e com qual dt.
+        
+        Entidades fora do sistema "lod" e as visiveis (na tela ou a ate
+        AI_LOD_MARGIN da borda) rodam todo tick, sem saltos na tela. As distantes ficam em AI_LOD_BUCKETS baldes
+        (pelo indice) e cada tick roda so um balde, com o tempo passado desde
+        a ultima vez de cada entidade: o movimento cobre a mesma distancia em
+        passos maiores e, entre uma vez e outra, a entidade nao custa nada. A
+        posicao de quem esta fora so e revista na vez do seu balde; a margem
+        cobre os AI_LOD_BUCKETS - 1 ticks de atraso ate voltar a taxa cheia.
+        
+        Retorna {dt: ids} e guarda em near quem rodou em taxa cheia (os unicos
+        perto o bastante para encostar no jogador, que nao sai da tela).
+        """
+        previous = self.lod_clock
+        now = self.lod_clock = previous + dt
+        self.lod_tick = (self.lod_tick + 1) % len(self.lod_buckets)
+        near, last, alive = self.lod_near, self.lod_time, self.alive
+        x, y = self.x, self.y
+        left, right = -AI_LOD_MARGIN, WIDTH + AI_LOD_MARGIN
+        top, bottom = -AI_LOD_MARGIN, HEIGHT + AI_LOD_MARGIN
+        steady = list(self.steady)
+        groups = {dt: list(steady)}
+        due = dict.fromkeys(near)
+        due.update(self.lod_buckets[self.lod_tick])
+        for eid in due:
+            if not alive[eid]:
+                continue
+            if left <= x[eid] <= right and top <= y[eid] <= bottom:
+                near[eid] = None
+            else:
+                near.pop(eid, None)
+            step = dt if last[eid] == previous else now - last[eid]
+            last[eid] = now
+            groups.setdefault(step, []).append(eid)
+        self.near = steady + list(near)
+        if len(groups) == 1 and len(groups[dt]) == len(steady) + len(self.members["lod"]):
+            groups[dt] = None  # Todos em taxa cheia: os sistemas nao precisam filtrar
+        return groups
+    
+    def patrol_system(self, dt, ids=None):
+        """Anda entre patrol_left e patrol_right, virando nos limites."""
+        x, vx, facing = self.x, self.vx, self.facing
+        left, right, speed = self.patrol_left, self.patrol_right, self.patrol_speed
+        step = dt * 60
+        for eid in self.select("patrol", ids):
+            x[eid] += vx[eid] * step
+            # Reflete o que passou do limite (passos grandes no rodizio de LOD)
+            if x[eid] <= left[eid]:
+                x[eid] = min(right[eid], 2 * left[eid] - x[eid])
+                vx[eid] = speed[eid]
+                facing[eid] = True
+            elif x[eid] >= right[eid]:
+                x[eid] = max(left[eid], 2 * right[eid] - x[eid])
+                vx[eid] = -speed[eid]
+                facing[eid] = False
+    
+    def script_system(self, dt, target, ids=None):
+        """Avanca os scripts de comportamento (ver BossScript).
         
+        Por tick o custo e so contar o tempo do passo atual; a fase so e
+        reavaliada quando a vida muda.
+        """
+        if target is None:
+            return
+        ticks = int(dt * 60 + 0.5)
+        health, last_health = self.health, self.script_health
+        phase, step, clock = self.script_phase, self.script_step, self.script_clock
+        for eid in self.select("script", ids):
+            script = self.script[eid]
+            if health[eid] != last_health[eid]:
+                last_health[eid] = health[eid]
+                new_phase = script.phase_for(health[eid], self.max_health[eid])
+                if new_phase != phase[eid]:
+                    # Fase nova comeca do primeiro passo
+                    phase[eid] = new_phase
+                    step[eid] = 0
+                    clock[eid] = 0
+            steps = script.phases[phase[eid]][1]
+            enter, duration, args = steps[step[eid]]
+            if clock[eid] == 0:
+                self.telegraph[eid] = False
+                enter(self, eid, target, *args)
+            clock[eid] += ticks
+            if clock[eid] >= duration:
+                clock[eid] = 0
+                step[eid] = (step[eid] + 1) % len(steps)
+    
+    def set_nav(self, nav):
+        """Troca o NavGraph; quem navega cai e pousa de novo no nivel novo."""
+        self.nav = nav
+        self.target_node = None
+        for eid in self.members["nav"]:
+            self.grounded[eid] = False
+            self.nav_node[eid] = -1
+    
+    def nav_system(self, dt, target, ids=None):
+        """Gravidade, pouso nas plataformas e rota ate o alvo pelo NavGraph.
+        
+        No chao, quem esta em outra plataforma que o alvo recebe em goal_x o
+        ponto da proxima ligacao da rota (waypoint ligado) e, chegando na
+        saida de um pulo, pula com a forca e a velocidade horizontal que o
+        levam ao destino. No ar so cai; chase_system nao mexe em vx ate o pouso.
+        Os passos de script nunca derrubam a entidade: param na borda.
+        """
+        nav = self.nav
+        if nav is None:
+            return
+        members = self.select("nav", ids)
+        if not members:
+            return
+        goal = None
+        if target is not None:
+            # No do alvo uma vez por chamada (no ar, vale o ultimo onde pisou)
+            node = nav.locate(target.x, target.y + self.hit_h[target.eid] // 2)
+            if node is not None:
+                self.target_node = node
+            goal = self.target_node
+        x, y, vx, vy, foot = self.x, self.y, self.vx, self.vy, self.foot
+        grounded, at, goal_x, waypoint = self.grounded, self.nav_node, self.goal_x, self.waypoint
+        step = dt * 60
+        fall = GRAVITY * step
+        for eid in members:
+            if not grounded[eid]:
+                # Integracao exata com gravidade constante: o pulo sobe o mesmo com qualquer dt
+                prev_feet = y[eid] + foot[eid]
+                y[eid] += (vy[eid] + fall / 2) * step
+                vy[eid] = min(vy[eid] + fall, MAX_FALL_SPEED)
+                feet = y[eid] + foot[eid]
+                if feet > prev_feet:
+                    landing = nav.landing(x[eid], prev_feet, feet)
+                    if landing is not None:
+                        grounded[eid] = True
+                        at[eid] = landing
+                        y[eid] = nav.nodes[landing].top - foot[eid]
+                        vy[eid] = 0
+                continue
+            platform = nav.nodes[at[eid]]
+            if not platform.left <= x[eid] <= platform.right:
+                if self.chase_active[eid]:
+                    grounded[eid] = False  # Saiu pela borda
+                    continue
+                # Passos de script (investida) param na borda em vez de cair
+                x[eid] = max(platform.left, min(platform.right, x[eid]))
+                vx[eid] = 0
+            waypoint[eid] = False
+            if goal is None or goal == at[eid]:
+                continue
+            link = nav.next_link(at[eid], goal)
+            if link is None:
+                continue  # Sem caminho: persegue o alvo ate onde a plataforma deixar
+            kind, from_x, to_x, _, rise, _ = link
+            waypoint[eid] = True
+            if kind != NavGraph.JUMP:
+                goal_x[eid] = to_x
+            elif abs(x[eid] - from_x) > self.chase_speed[eid] * step or not self.chase_active[eid]:
+                goal_x[eid] = from_x
+            else:
+                # Na saida: forca para subir rise com folga e vx para cobrir o vao no ar
+                speed = math.sqrt(2 * GRAVITY * (rise + NAV_JUMP_CLEARANCE))
+                airtime = (speed + math.sqrt(2 * GRAVITY * NAV_JUMP_CLEARANCE)) / GRAVITY
+                x[eid] = from_x
+                vx[eid] = (to_x - from_x) / airtime
+                vy[eid] = -speed
+                if vx[eid]:
+                    self.facing[eid] = vx[eid] > 0
+                grounded[eid] = False
+    
+    def chase_system(self, dt, target, ids=None):
+        """Persegue o alvo no eixo x e ataca por contato com intervalo entre ataques.
+        
+        Com chase_active desligado (um passo de script no controle) ou no ar
+        so aplica a velocidade atual. Com waypoint ligado (ver nav_system) anda
+        ate goal_x em vez de ir direto no alvo.
+        """
+        if target is None:
+            return
+        x, y, vx, facing = self.x, self.y, self.vx, self.facing
+        cooldown = self.attack_cooldown
+        step = dt * 60
+        for eid in self.select("chase", ids):
+            distance = abs(x[eid] - target.x)
+            if self.waypoint[eid]:
+                goal, stop = self.goal_x[eid], 0
+            else:
+                goal, stop = target.x, self.chase_stop[eid]
+            # Perseguir se estiver longe, parar se estiver perto
+            if not self.chase_active[eid] or not self.grounded[eid]:
+                pass
+            elif abs(x[eid] - goal) > stop:
+                if x[eid] < goal:
+                    vx[eid] = self.chase_speed[eid]
+                    facing[eid] = True
+                else:
+                    vx[eid] = -self.chase_speed[eid]
+                    facing[eid] = False
+            else:
+                vx[eid] = 0
+            x[eid] += vx[eid] * step
+            # Atacar se proximo do alvo (e na mesma altura, com as plataformas)
+            if distance < self.attack_range[eid] and abs(y[eid] - target.y) < self.attack_range[eid] and cooldown[eid] <= 0:
+                cooldown[eid] = self.attack_delay[eid]
+                if target.take_damage() and self.events is not None:
+                    self.events.push(GameEvent.DAMAGE, target.x, target.y)
+            if cooldown[eid] > 0:
+                cooldown[eid] -= dt
+            # Animacao de ataque logo depois de atacar ou avisando um ataque
+            self.attacking[eid] = cooldown[eid] > self.attack_delay[eid] - 0.3 or self.telegraph[eid]
+    
+    def clamp_system(self, ids=None):
+        """Mantem as entidades dentro dos limites da tela."""
+        x, y = self.x, self.y
+        for eid in self.select("clamp", ids):
+            x[eid] = max(self.min_x[eid], min(self.max_x[eid], x[eid]))
+            y[eid] = min(self.max_y[eid], max(self.min_y[eid], y[eid]))
+    
+    def hit_effect_system(self, dt, ids=None):
+        """Desliga o flash de hit depois de 0.2 segundos."""
+        active, timer = self.hit_active, self.hit_timer
+        for eid in self.select("hit_effect", ids):
+            if active[eid]:
+                timer[eid] += dt
+                if timer[eid] >= 0.2:
+                    active[eid] = False
+                    timer[eid] = 0
+    
+    def animation_system(self, dt, ids=None):
+        """Maquina de estados da animacao: hit > ataque > andar > parado.
+        
+        Trocar de estado reinicia o relogio da animacao; o frame e resolvido
+        no desenho a partir do relogio em ticks (ver AnimationSet).
+        """
+        ticks = int(dt * 60 + 0.5)
+        vx, hit_active, attacking = self.vx, self.hit_active, self.attacking
+        state, tick = self.anim_state, self.anim_tick
+        for eid in self.select("animation", ids):
+            if hit_active[eid]:
+                new_state = ANIM_HIT
+            elif attacking[eid]:
+                new_state = ANIM_ATTACK
+            elif vx[eid]:
+                new_state = ANIM_WALK
+            else:
+                new_state = ANIM_IDLE
+            if new_state != state[eid]:
+                state[eid] = new_state
+                tick[eid] = 0
+            else:
+                tick[eid] += ticks
+
+
+class Component:
+    """Atributo de entidade guardado em uma coluna do World."""
+    
+    def __init__(self, column):
+        self.column = column
+    
+    def __get__(self, entity, owner=None):
+        if entity is None:
+            return self
+        return entity.world.__dict__[self.column][entity.eid]
+    
+    def __set__(self, entity, value):
+        entity.world.__dict__[self.column][entity.eid] = value
+
+
+class Entity:
+    """Base das entidades: uma fachada sobre um indice do World.
+    
+    Cada subclasse e um arquetipo: define em quais sistemas a entidade entra
+    e com quais valores iniciais de componentes.
+    """
+    
+    x = Component("x")
+    y = Component("y")
+    velocity_x = Component("vx")
+    velocity_y = Component("vy")
+    facing_right = Component("facing")
+    alive = Component("alive")
+    anim_state = Component("anim_state")
+    hit_effect = Component("hit_active")
+    hit_effect_timer = Component("hit_timer")
+    
+    SYSTEMS = ("animation",)
+    KIND = CHAR_HERO
+    
+    def __init__(self, x, y, world=None, **components):
+        self.world = world if world is not None else World()
+        self.eid = self.world.spawn(
+            self.SYSTEMS,
+            x=x,
+            y=y,
+            anim_kind=self.KIND,
+            hit_w=40 * SPRITE_SCALE,
+            hit_h=60 * SPRITE_SCALE,
+            **components
+        )
+    
     def update_animation(self, dt):
-        """Atualiza o frame da animacao."""
-        self.animation_timer += dt
-        if self.animation_timer >= self.animation_speed:
-            self.animation_timer = 0
-            self.current_frame += 1
+        """Atualiza o estado e o relogio da animacao."""
+        self.world.animation_system(dt, (self.eid,))
     
     def get_rect(self):
         """Retorna o retangulo de colisao."""
-        # Ajustado para sprites menores (escala 0.35)
-        base_width = 40 * SPRITE_SCALE
-        base_height = 60 * SPRITE_SCALE
-        return Rect(self.x - base_width // 2, self.y - base_height // 2, base_width, base_height)
+        return self.world.rect(self.eid)
+    
+    def destroy(self):
+        """Remove a entidade do World."""
+        self.world.destroy(self.eid)
 
 
-class Player(AnimatedSprite):
+def screen_limits():
+    """Limites de x (min, max) para entidades do tamanho padrao."""
+    sprite_width = 40 * SPRITE_SCALE
+    return sprite_width // 2 + 5, WIDTH - sprite_width // 2 - 5
+
+
+class Player(Entity):
     """Classe do jogador com fisica e controles."""
     
-    def __init__(self, x, y):
-        super().__init__(x, y)
+    SYSTEMS = ("hit_effect", "animation")
+    KIND = CHAR_HERO
+    
+    is_attacking = Component("attacking")
+    
+    def __init__(self, x, y, world=None):
+        super().__init__(x, y, world)
         self.on_ground = False
+        self.landed = False  # Tocou o chao neste tick (poeira)
         self.lives = 3
         self.invincible = False
         self.invincible_timer = 0
@@ -84,92 +700,99 @@ class Player(AnimatedSprite):
         self.attack_timer = 0
         self.attack_hit_this_frame = False  # Evitar multiplos hits no mesmo ataque
         self.attack_sound_played = False  # Flag para tocar som apenas uma vez
-        self.show_impact = False  # Flag para mostrar sprite de impacto
-        self.impact_timer = 0  # Timer para o sprite de impacto
-        self.impact_x = 0  # Posicao X do impacto
-        self.impact_y = 0  # Posicao Y do impacto
+        self.shot_timer = 0  # Tempo ate poder atirar de novo
         self.collectibles_collected = 0
-        # Sprites disponiveis
-        self.images_idle = ["hero_paused"]
-        self.images_walk = ["hero_walk_01", "hero_walk_02"]
-        self.images_attack = ["hero_attack_02"]
-        self.images_attack_impact = ["hero_attack_impact"]
-        self.current_sprite_index = 0
-        self.attack_frame = 0
         
     def update(self, dt, platforms, keyboard):
-        """Atualiza o jogador a cada frame."""
+        """Atualiza o jogador a cada frame.
+        
+        platforms e a PlatformGrid do nivel atual.
+        """
+        was_on_ground = self.on_ground
+        
+        # Componentes lidos uma vez e gravados de volta no World no fim da fisica
+        x = self.x
+        y = self.y
+        velocity_y = self.velocity_y
+        
         # Movimento horizontal (APENAS SETAS)
-        self.velocity_x = 0
+        velocity_x = 0
         self.is_moving = False
         
         if keyboard.left:
-            self.velocity_x = -PLAYER_SPEED
+            velocity_x = -PLAYER_SPEED
             self.facing_right = False
             self.is_moving = True
         elif keyboard.right:
-            self.velocity_x = PLAYER_SPEED
+            velocity_x = PLAYER_SPEED
             self.facing_right = True
             self.is_moving = True
         
         # Pulo (APENAS SETA PARA CIMA OU ESPACO)
         sound_to_play = None
         if (keyboard.space or keyboard.up) and self.on_ground:
-            self.velocity_y = JUMP_STRENGTH
+            velocity_y = JUMP_STRENGTH
             self.on_ground = False
             sound_to_play = "jump"
         
-        # Aplicar gravidade
-        self.velocity_y += GRAVITY
-        
-        # Atualizar posicao
-        self.x += self.velocity_x
-        self.y += self.velocity_y
+        # Aplicar gravidade (com velocidade terminal)
+        velocity_y = min(velocity_y + GRAVITY, MAX_FALL_SPEED)
         
         # Limitar aos limites da tela (usando tamanho do sprite)
         sprite_width = 40 * SPRITE_SCALE
         sprite_height = 60 * SPRITE_SCALE
+        
+        # Posicao antes do movimento, para a colisao continua
+        prev_x = x
+        prev_bottom = y - sprite_height // 2 + sprite_height
+        
+        # Atualizar posicao
+        x += velocity_x
+        y += velocity_y
+        
         # Limites mais rigorosos - nao passar das bordas
         min_x = sprite_width // 2 + 5
         max_x = WIDTH - sprite_width // 2 - 5
-        self.x = max(min_x, min(max_x, self.x))
+        x = max(min_x, min(max_x, x))
         # Limitar altura - nao passar acima do topo
         min_y = sprite_height // 2
-        self.y = max(min_y, self.y)
+        y = max(min_y, y)
         
-        # Colisao com plataformas
+        # Colisao continua com plataformas: a primeira plataforma cruzada no tick
         self.on_ground = False
         
-        for platform in platforms:
-            if self.check_platform_collision(platform):
-                if self.velocity_y > 0:
-                    # Ajustar posicao para ficar em cima da plataforma (pes na superficie)
-                    sprite_height = 60 * SPRITE_SCALE
-                    # Centralizar o sprite com os pes na parte superior da plataforma
-                    self.y = platform.top - sprite_height // 2
-                    self.velocity_y = 0
-                    self.on_ground = True
-                    break  # Sair apos encontrar primeira colisao
+        if velocity_y > 0:
+            landing = self.find_landing(platforms, prev_x, prev_bottom, x, y)
+            if landing is not None:
+                # Centralizar o sprite com os pes na parte superior da plataforma
+                y = landing.top - sprite_height // 2
+                velocity_y = 0
+                self.on_ground = True
         
         # Chao - nao permitir passar abaixo (ajustar para pes no chao) - VERIFICAR DEPOIS DAS PLATAFORMAS
         ground_surface = GROUND_Y  # A superficie do chao
-        sprite_height = 60 * SPRITE_SCALE
-        feet_position = self.y + sprite_height // 2  # Posicao dos pes do personagem
+        feet_position = y + sprite_height // 2  # Posicao dos pes do personagem
 
         # Verificar se os pes estao no chao ou abaixo dele
         if feet_position > ground_surface:
             # Garantir que o personagem nao passe atraves do chao
-            self.y = ground_surface - sprite_height // 2
+            y = ground_surface - sprite_height // 2
             # Se estava caindo, parar a queda imediatamente
-            if self.velocity_y > 0:
-                self.velocity_y = 0
+            if velocity_y > 0:
+                velocity_y = 0
             self.on_ground = True
         elif feet_position == ground_surface:
             # Se os pes estao exatamente no chao, garantir que nao caia mais
-            if self.velocity_y > 0:
-                self.velocity_y = 0
+            if velocity_y > 0:
+                velocity_y = 0
             self.on_ground = True
         
+        self.x = x
+        self.y = y
+        self.velocity_x = velocity_x
+        self.velocity_y = velocity_y
+        self.landed = self.on_ground and not was_on_ground
+        
         # Atualizar invencibilidade
         if self.invincible:
             self.invincible_timer -= dt
@@ -182,36 +805,13 @@ class Player(AnimatedSprite):
             if self.attack_timer <= 0:
                 self.is_attacking = False
                 self.attack_hit_this_frame = False  # Resetar ao terminar ataque
-            else:
-                # Usar sempre frame 0 (so temos hero_attack_02)
-                self.attack_frame = 0
-                # Resetar flag de som quando ataque termina
-                if self.attack_timer <= 0:
-                    self.attack_sound_played = False
         else:
             # Resetar flag de som quando nao esta atacando
             self.attack_sound_played = False
         
-        # Atualizar sprite de impacto
-        if self.show_impact:
-            self.impact_timer += dt
-            if self.impact_timer >= 0.15:  # Mostrar por 0.15 segundos
-                self.show_impact = False
-                self.impact_timer = 0
-        
-        # Atualizar animacao
-        self.update_animation(dt)
-        
-        # Atualizar indice do sprite baseado no estado
-        if self.is_attacking:
-            # Usar frame de ataque
-            self.current_sprite_index = self.attack_frame
-        elif self.is_moving:
-            # Alternar entre os dois sprites de caminhada
-            self.current_sprite_index = int(self.current_frame) % len(self.images_walk)
-        else:
-            # Sprite parado
-            self.current_sprite_index = 0
+        # Recarga do tiro
+        if self.shot_timer > 0:
+            self.shot_timer -= dt
         
         return sound_to_play
     
@@ -220,10 +820,16 @@ class Player(AnimatedSprite):
         if not self.is_attacking:
             self.is_attacking = True
             self.attack_timer = ATTACK_DURATION
-            self.attack_frame = 0
             self.attack_hit_this_frame = False  # Resetar flag de hit
             self.attack_sound_played = False  # Flag para tocar som apenas uma vez
     
+    def shoot(self):
+        """Inicia a recarga do tiro; retorna False se ainda estiver recarregando."""
+        if self.shot_timer > 0:
+            return False
+        self.shot_timer = PLAYER_SHOT_COOLDOWN
+        return True
+    
     def get_attack_rect(self):
         """Retorna o retangulo de area de ataque."""
         base_size = 40 * SPRITE_SCALE
@@ -235,17 +841,40 @@ class Player(AnimatedSprite):
         else:
             return Rect(self.x - offset_x - attack_width, self.y - base_size // 2 - 10, attack_width, attack_height)
     
-    def check_platform_collision(self, platform):
-        """Verifica colisao com uma plataforma."""
-        player_rect = self.get_rect()
-        # Colisao mais precisa - verifica se esta caindo e se os pes estao sobre a plataforma
-        return (
-            player_rect.right > platform.left + 5 and
-            player_rect.left < platform.right - 5 and
-            player_rect.bottom >= platform.top - 5 and
-            player_rect.bottom <= platform.top + 15 and
-            self.velocity_y >= 0
-        )
+    def find_landing(self, platforms, prev_x, prev_bottom, x, y):
+        """Retorna a plataforma onde os pes tocam primeiro neste tick (ou None).
+        
+        Varre o movimento do tick inteiro, de (prev_x, prev_bottom) ate (x, y):
+        os pes cruzando o topo de uma plataforma contam mesmo que a queda
+        tenha sido maior que ela.
+        """
+        sprite_height = 60 * SPRITE_SCALE
+        bottom = y - sprite_height // 2 + sprite_height
+        half_width = 40 * SPRITE_SCALE / 2
+        travel = bottom - prev_bottom
+        best = None
+        best_time = 2.0
+        for platform in platforms.query(min(prev_x, x) - half_width, max(prev_x, x) + half_width):
+            time_of_impact = self.platform_impact_time(platform, prev_x, x, prev_bottom, bottom, travel, half_width)
+            if time_of_impact is not None and time_of_impact < best_time:
+                best = platform
+                best_time = time_of_impact
+        return best
+    
+    def platform_impact_time(self, platform, prev_x, x, prev_bottom, bottom, travel, half_width):
+        """Instante (0 a 1) em que os pes tocam o topo da plataforma, ou None."""
+        top = platform.top
+        # Pes comecaram acima do topo (com 15 px de folga para degraus) e terminaram nele ou abaixo
+        if prev_bottom > top + 15 or bottom < top - 5:
+            return None
+        time_of_impact = 0.0
+        if travel > 0 and prev_bottom < top:
+            time_of_impact = (top - prev_bottom) / travel
+        # Posicao horizontal no instante do impacto
+        impact_x = prev_x + (x - prev_x) * time_of_impact
+        if impact_x + half_width > platform.left + 5 and impact_x - half_width < platform.right - 5:
+            return time_of_impact
+        return None
     
     def take_damage(self):
         """Recebe dano se nao estiver invencivel."""
@@ -253,6 +882,9 @@ class Player(AnimatedSprite):
             self.lives -= 1
             self.invincible = True
             self.invincible_timer = 2.0
+            # Animacao de hit
+            self.hit_effect = True
+            self.hit_effect_timer = 0
             return True
         return False
 
@@ -279,80 +911,158 @@ class Collectible:
         return collectible_rect.colliderect(player_rect)
 
 
-class Boss(AnimatedSprite):
+def script_chase(world, eid, target, speed):
+    """Passo 'perseguir': a perseguicao normal, com a velocidade dada."""
+    world.chase_active[eid] = True
+    world.chase_speed[eid] = speed
+
+
+def script_wait(world, eid, target):
+    """Passo 'esperar': fica parado."""
+    world.chase_active[eid] = False
+    world.vx[eid] = 0
+
+
+def script_telegraph(world, eid, target):
+    """Passo 'avisar': parado na pose de ataque antes do golpe."""
+    script_wait(world, eid, target)
+    world.telegraph[eid] = True
+
+
+def script_dash(world, eid, target, speed):
+    """Passo 'investida': corre em linha reta na direcao do alvo."""
+    world.chase_active[eid] = False
+    facing = target.x >= world.x[eid]
+    world.facing[eid] = facing
+    world.vx[eid] = speed if facing else -speed
+
+
+def script_shoot(world, eid, target, count, spread, speed):
+    """Passo 'atirar': leque de projeteis mirado no alvo."""
+    script_wait(world, eid, target)
+    if world.projectiles is None:
+        return
+    # O y do boss e o dos pes (no chao); os tiros saem do centro do corpo
+    x, y = world.x[eid], world.y[eid] - 60 * SPRITE_SCALE // 2
+    aim = math.atan2(target.y - y, target.x - x)
+    world.facing[eid] = target.x >= x
+    for i in range(count):
+        offset = (i / (count - 1) - 0.5) * spread if count > 1 else 0
+        angle = aim + math.radians(offset)
+        world.projectiles.spawn(x, y, math.cos(angle) * speed, math.sin(angle) * speed, eid)
+
+
+class BossScript:
+    """Comportamento de um boss lido de um arquivo de dados (bosses/*.json).
+    
+    O arquivo tem fases, cada uma ativa a partir de uma fracao da vida, com
+    passos repetidos em loop. Compilar transforma cada passo numa tupla
+    (funcao de entrada, duracao em ticks, argumentos): a funcao roda uma vez
+    no inicio do passo e os sistemas do World fazem o resto.
+    """
+    
+    # Passo -> (funcao de entrada, parametros e valores padrao)
+    OPS = {
+        "perseguir": (script_chase, (("velocidade", 1.5),)),
+        "esperar": (script_wait, ()),
+        "avisar": (script_telegraph, ()),
+        "investida": (script_dash, (("velocidade", 6),)),
+        "atirar": (script_shoot, (("quantidade", 3), ("abertura", 30), ("velocidade", 4))),
+    }
+    
+    def __init__(self, name, phases):
+        self.name = name
+        self.phases = phases  # [(fracao da vida, passos)], em ordem de vida decrescente
+    
+    @classmethod
+    def compile(cls, data, source="script"):
+        """Valida e compila o conteudo de um arquivo de script."""
+        phases = []
+        for number, phase in enumerate(data.get("fases", ()), 1):
+            where = f"{source}, fase {number}"
+            threshold = float(phase.get("vida", 1.0))
+            if phases and threshold >= phases[-1][0]:
+                raise ValueError(f"{where}: 'vida' deve diminuir a cada fase")
+            steps = []
+            for step in phase.get("passos", ()):
+                op = step.get("op")
+                if op not in cls.OPS:
+                    raise ValueError(f"{where}: passo desconhecido {op!r} (use {', '.join(cls.OPS)})")
+                enter, params = cls.OPS[op]
+                unknown = set(step) - {"op", "segundos"} - {name for name, _ in params}
+                if unknown:
+                    raise ValueError(f"{where}: parametros desconhecidos em {op!r}: {', '.join(sorted(unknown))}")
+                duration = max(1, round(float(step.get("segundos", 1.0)) * 60))
+                args = tuple(step.get(name, default) for name, default in params)
+                steps.append((enter, duration, args))
+            if not steps:
+                raise ValueError(f"{where}: nenhum passo")
+            phases.append((threshold, tuple(steps)))
+        if not phases:
+            raise ValueError(f"{source}: nenhuma fase")
+        return cls(data.get("nome", "BOSS"), tuple(phases))
+    
+    def phase_for(self, health, max_health):
+        """Indice da fase para a vida atual."""
+        ratio = health / max_health if max_health else 0
+        index = 0
+        for i, (threshold, _) in enumerate(self.phases):
+            if ratio <= threshold:
+                index = i
+        return index
+
+
+# Scripts ja compilados, por caminho (cada arquivo e lido uma vez)
+BOSS_SCRIPTS = {}
+
+
+def load_boss_script(path=BOSS_SCRIPT):
+    """Carrega e compila um script de boss (com cache)."""
+    script = BOSS_SCRIPTS.get(path)
+    if script is None:
+        with open(resource_path(path), encoding="utf-8") as f:
+            script = BossScript.compile(json.load(f), path)
+        BOSS_SCRIPTS[path] = script
+    return script
+
+
+class Boss(Entity):
     """Classe para o boss."""
     
-    def __init__(self, x, y):
-        super().__init__(x, y)
-        self.max_health = 100
-        self.health = self.max_health
-        self.alive = True
-        self.velocity_x = 1.5
-        self.facing_right = True
-        self.hit_effect = False
-        self.hit_effect_timer = 0
-        # Sprites do boss (usando sprites de inimigo)
-        self.images_idle = ["enemy_paused"]
-        self.images_walk = ["enemy_walk_01", "enemy_walk_02"]
-        self.images_attack = ["enemy_attack_01"]
-        self.current_sprite_index = 0
-        self.attack_cooldown = 0
-        self.attack_range = 40
+    SYSTEMS = ("script", "nav", "chase", "clamp", "hit_effect", "animation")
+    KIND = CHAR_BOSS
+    
+    attack_cooldown = Component("attack_cooldown")
+    attack_range = Component("attack_range")
+    health = Component("health")
+    max_health = Component("max_health")
+    script = Component("script")
+    telegraph = Component("telegraph")
+    
+    def __init__(self, x, y, world=None, script=None):
+        min_x, max_x = screen_limits()
+        super().__init__(
+            x, y, world,
+            vx=1.5,
+            chase_speed=1.5,
+            chase_stop=40,  # Se estiver perto, parar e atacar
+            attack_range=40,
+            attack_delay=BOSS_ATTACK_COOLDOWN,
+            script=script if script is not None else load_boss_script(),
+            health=BOSS_MAX_HEALTH,
+            max_health=BOSS_MAX_HEALTH,
+            # Anda pelas plataformas (ver NavGraph); o centro fica na altura dos pes
+            grounded=False,
+            foot=0,
+            min_x=min_x,
+            max_x=max_x,
+            min_y=0,
+            max_y=GROUND_Y,
+        )
     
     def update(self, dt, player):
         """Atualiza o boss."""
-        if not self.alive:
-            return
-        
-        # Limites da tela - mais rigorosos
-        sprite_width = 40 * SPRITE_SCALE
-        sprite_height = 60 * SPRITE_SCALE
-        min_x = sprite_width // 2 + 5
-        max_x = WIDTH - sprite_width // 2 - 5
-        
-        # Garantir que o boss esta sempre no chao (GROUND_Y e onde os pes devem estar)
-        self.y = GROUND_Y
-        
-        # Movimento melhorado em direcao ao jogador
-        distance_to_player = abs(self.x - player.x)
-        
-        # Sempre perseguir o jogador se estiver longe
-        if distance_to_player > 40:  # Se estiver longe, perseguir
-            if self.x < player.x:
-                self.velocity_x = 1.5  # Velocidade fixa
-                self.facing_right = True
-            else:
-                self.velocity_x = -1.5
-                self.facing_right = False
-        else:
-            # Se estiver perto, parar e atacar
-            self.velocity_x = 0
-        
-        # Aplicar movimento
-        self.x += self.velocity_x * dt * 60
-        
-        # Aplicar limites - nao permitir sair da tela
-        self.x = max(min_x, min(max_x, self.x))
-        
-        # Atualizar efeito de hit
-        if self.hit_effect:
-            self.hit_effect_timer += dt
-            if self.hit_effect_timer >= 0.2:
-                self.hit_effect = False
-                self.hit_effect_timer = 0
-        
-        # Atacar se proximo do jogador
-        if distance_to_player < self.attack_range and self.attack_cooldown <= 0:
-            self.attack_cooldown = 2.0  # 2 segundos entre ataques
-            # Causar dano ao jogador
-            if player.take_damage():
-                pass  # Som ja e tocado na funcao take_damage
-        
-        if self.attack_cooldown > 0:
-            self.attack_cooldown -= dt
-        
-        self.update_animation(dt)
-        self.current_sprite_index = int(self.current_frame) % len(self.images_walk)
+        self.world.run(dt, player, (self.eid,))
     
     def take_damage(self, amount=10):
         """Recebe dano."""
@@ -361,68 +1071,36 @@ class Boss(AnimatedSprite):
             if self.health <= 0:
                 self.health = 0
                 self.alive = False
-    
-    def get_rect(self):
-        """Retorna o retangulo de colisao."""
-        base_width = 40 * SPRITE_SCALE
-        base_height = 60 * SPRITE_SCALE
-        return Rect(self.x - base_width // 2, self.y - base_height // 2, base_width, base_height)
 
 
-class Enemy(AnimatedSprite):
+class Enemy(Entity):
     """Classe de inimigos com patrulha territorial."""
     
-    def __init__(self, x, y, patrol_left, patrol_right):
-        super().__init__(x, y)
-        self.patrol_left = patrol_left
-        self.patrol_right = patrol_right
-        self.velocity_x = ENEMY_SPEED
-        self.alive = True
-        self.hit_effect = False
-        self.hit_effect_timer = 0
-        # Sprites disponiveis
-        self.images_idle = ["enemy_paused"]
-        self.images_walk = ["enemy_walk_01", "enemy_walk_02"]
-        self.current_sprite_index = 0
-        
+    SYSTEMS = ("lod", "patrol", "clamp", "hit_effect", "animation", "enemy")
+    KIND = CHAR_ENEMY
+    
+    patrol_left = Component("patrol_left")
+    patrol_right = Component("patrol_right")
+    
+    def __init__(self, x, y, patrol_left, patrol_right, world=None, **components):
+        min_x, max_x = screen_limits()
+        sprite_height = 60 * SPRITE_SCALE
+        values = dict(
+            vx=ENEMY_SPEED,
+            patrol_left=patrol_left,
+            patrol_right=patrol_right,
+            patrol_speed=ENEMY_SPEED,
+            min_x=min_x,
+            max_x=max_x,
+            min_y=sprite_height // 2,
+            max_y=GROUND_Y - sprite_height // 2,
+        )
+        values.update(components)
+        super().__init__(x, y, world, **values)
+    
     def update(self, dt):
         """Atualiza o inimigo com movimento de patrulha."""
-        if not self.alive:
-            return
-        
-        # Limites da tela - mais rigorosos
-        sprite_width = 40 * SPRITE_SCALE
-        min_x = sprite_width // 2 + 5
-        max_x = WIDTH - sprite_width // 2 - 5
-        self.x += self.velocity_x
-        self.x = max(min_x, min(max_x, self.x))
-        
-        # Limitar altura tambem
-        sprite_height = 60 * SPRITE_SCALE
-        max_y = GROUND_Y - sprite_height // 2
-        self.y = min(max_y, max(sprite_height // 2, self.y))
-        
-        # Inverter direcao nos limites de patrulha
-        if self.x <= self.patrol_left:
-            self.x = self.patrol_left
-            self.velocity_x = ENEMY_SPEED
-            self.facing_right = True
-        elif self.x >= self.patrol_right:
-            self.x = self.patrol_right
-            self.velocity_x = -ENEMY_SPEED
-            self.facing_right = False
-        
-        # Atualizar efeito de hit
-        if self.hit_effect:
-            self.hit_effect_timer += dt
-            if self.hit_effect_timer >= 0.2:
-                self.hit_effect = False
-                self.hit_effect_timer = 0
-        
-        self.update_animation(dt)
-        
-        # Atualizar indice do sprite de caminhada
-        self.current_sprite_index = int(self.current_frame) % len(self.images_walk)
+        self.world.run(dt, None, (self.eid,))
     
     def check_collision_with_player(self, player):
         """Verifica colisao com o jogador."""
@@ -431,6 +1109,352 @@ class Enemy(AnimatedSprite):
         return enemy_rect.colliderect(player_rect)
 
 
+class Hunter(Enemy):
+    """Inimigo que persegue o jogador pelas plataformas em vez de patrulhar."""
+    
+    SYSTEMS = ("lod", "nav", "chase", "clamp", "hit_effect", "animation", "enemy")
+    
+    def __init__(self, x, y, world=None):
+        # Dano so por contato (como os inimigos de patrulha), nunca para
+        super().__init__(
+            x, y, x, x, world,
+            vx=0.0,
+            chase_speed=ENEMY_SPEED,
+            grounded=False,
+            foot=60 * SPRITE_SCALE // 2,
+        )
+    
+    def update(self, dt, player=None):
+        """Atualiza o inimigo perseguindo o jogador."""
+        self.world.run(dt, player, (self.eid,))
+
+
+class ProjectilePool:
+    """Projeteis em arrays pre-alocados, movidos e testados em lote (numpy).
+    
+    Os projeteis vivos ficam compactados no inicio dos arrays e os que morrem
+    no tick saem todos de uma vez. Para a colisao os projeteis sao ordenados
+    por x; cada alvo (plataforma, jogador, inimigo) so testa a faixa de x que
+    encosta nele, achada por busca binaria.
+    """
+    
+    RADIUS = 6
+    LIFETIME = 4.0  # Segundos ate sumir
+    COLORS = {TEAM_PLAYER: ((90, 200, 255), (220, 245, 255)), TEAM_ENEMY: ((200, 60, 220), (255, 200, 255))}
+    
+    def __init__(self, capacity=PROJECTILE_CAPACITY):
+        self.capacity = capacity
+        self.x = np.zeros(capacity)
+        self.y = np.zeros(capacity)
+        self.vx = np.zeros(capacity)
+        self.vy = np.zeros(capacity)
+        self.life = np.zeros(capacity)
+        self.owner = np.zeros(capacity, dtype=np.int32)
+        self.team = np.zeros(capacity, dtype=np.int8)
+        self.arrays = (self.x, self.y, self.vx, self.vy, self.life, self.owner, self.team)
+        self.count = 0
+        self.dropped = 0  # Disparos perdidos com o pool cheio
+        self.sprites = None  # Sprite de cada lado, criado no primeiro desenho
+    
+    def __len__(self):
+        return self.count
+    
+    def spawn(self, x, y, vx, vy, owner, team=TEAM_ENEMY):
+        """Dispara um projetil (velocidade em pixels por tick)."""
+        i = self.count
+        if i >= self.capacity:
+            self.dropped += 1
+            return
+        self.x[i] = x
+        self.y[i] = y
+        self.vx[i] = vx
+        self.vy[i] = vy
+        self.life[i] = self.LIFETIME
+        self.owner[i] = owner
+        self.team[i] = team
+        self.count = i + 1
+    
+    def clear(self):
+        """Remove todos os projeteis."""
+        self.count = 0
+    
+    def update(self, dt, player_rect, world=None, platforms=()):
+        """Move os projeteis e resolve as colisoes.
+        
+        Projeteis inimigos acertam o jogador, os do jogador acertam as
+        entidades de patrulha e de perseguicao do world, e plataformas param
+        qualquer projetil. Retorna (jogador atingido, {eid: acertos}).
+        """
+        n = self.count
+        if n == 0:
+            return False, {}
+        step = dt * 60
+        radius = self.RADIUS
+        x, y, life, team = self.x[:n], self.y[:n], self.life[:n], self.team[:n]
+        x += self.vx[:n] * step
+        y += self.vy[:n] * step
+        life -= dt
+        dead = (life <= 0) | (x < -radius) | (x > WIDTH + radius) | (y < -radius) | (y > HEIGHT + radius)
+        
+        # Broadphase: projeteis ordenados por x
+        order = np.argsort(x)
+        sorted_x = x[order]
+        
+        def touching(left, top, right, bottom):
+            lo, hi = np.searchsorted(sorted_x, (left - radius, right + radius))
+            if lo == hi:
+                return order[:0]
+            candidates = order[lo:hi]
+            candidate_y = y[candidates]
+            return candidates[(candidate_y > top - radius) & (candidate_y < bottom + radius) & ~dead[candidates]]
+        
+        for platform in platforms:
+            dead[touching(platform.left, platform.top, platform.right, platform.bottom)] = True
+        
+        hits = touching(player_rect.left, player_rect.top, player_rect.right, player_rect.bottom)
+        hits = hits[team[hits] == TEAM_ENEMY]
+        player_hit = len(hits) > 0
+        dead[hits] = True
+        
+        entity_hits = {}
+        if world is not None and (team == TEAM_PLAYER).any():
+            for eid in [*world.select("patrol", None), *world.select("chase", None)]:
+                half_w = world.hit_w[eid] // 2
+                half_h = world.hit_h[eid] // 2
+                hits = touching(world.x[eid] - half_w, world.y[eid] - half_h, world.x[eid] + half_w, world.y[eid] + half_h)
+                hits = hits[team[hits] == TEAM_PLAYER]
+                if len(hits):
+                    entity_hits[eid] = len(hits)
+                    dead[hits] = True
+        
+        # Compactar os sobreviventes no inicio dos arrays
+        keep = ~dead
+        alive = int(keep.sum())
+        if alive < n:
+            for array in self.arrays:
+                array[:alive] = array[:n][keep]
+        self.count = alive
+        return player_hit, entity_hits
+    
+    def draw(self, surface):
+        """Desenha todos os projeteis com um unico blits."""
+        n = self.count
+        if n == 0:
+            return
+        if self.sprites is None:
+            size = self.RADIUS * 2 + 1
+            self.sprites = {}
+            for team, (fill, border) in self.COLORS.items():
+                sprite = pygame.Surface((size, size), pygame.SRCALPHA)
+                pygame.draw.circle(sprite, fill, (self.RADIUS, self.RADIUS), self.RADIUS)
+                pygame.draw.circle(sprite, border, (self.RADIUS, self.RADIUS), self.RADIUS, 1)
+                self.sprites[team] = sprite
+        sprites = self.sprites
+        xs = (self.x[:n] - self.RADIUS).astype(np.int32).tolist()
+        ys = (self.y[:n] - self.RADIUS).astype(np.int32).tolist()
+        surface.blits([(sprites[team], (x, y)) for team, x, y in zip(self.team[:n].tolist(), xs, ys)], False)
+
+
+class ParticleSystem:
+    """Particulas em arrays contiguos, com um orcamento global.
+    
+    Mesmo esquema do ProjectilePool: as vivas ficam no inicio dos arrays, a
+    fisica e uma conta em lote por tick e o desenho e um unico blits, com
+    sprites pre-renderizados por tipo e nivel de transparencia.
+    """
+    
+    FADE_STEPS = 4  # Niveis de transparencia ate sumir
+    DAMPING = 0.94  # Perda de velocidade por tick
+    
+    def __init__(self, budget=PARTICLE_BUDGET):
+        self.budget = budget
+        self.limit = budget  # Teto atual (o governador de qualidade pode baixar)
+        self.x = np.zeros(budget)
+        self.y = np.zeros(budget)
+        self.vx = np.zeros(budget)
+        self.vy = np.zeros(budget)
+        self.life = np.zeros(budget)
+        self.max_life = np.ones(budget)
+        self.gravity = np.zeros(budget)
+        self.kind = np.zeros(budget, dtype=np.int32)
+        self.arrays = (self.x, self.y, self.vx, self.vy, self.life, self.max_life, self.gravity, self.kind)
+        self.count = 0
+        self.dropped = 0  # Particulas descartadas pelo orcamento
+        self.rng = np.random.default_rng()  # Separado do random do jogo (simulacoes deterministicas)
+        self.sprites = None  # Sprite por tipo e transparencia, criados no primeiro desenho
+        self.radius = np.array([PARTICLE_KINDS[kind][1] for kind in sorted(PARTICLE_KINDS)])
+    
+    def __len__(self):
+        return self.count
+    
+    def emit(self, kind, x, y, count, speed, direction=-90, spread=360):
+        """Solta count particulas em leque (direcao e abertura em graus)."""
+        start = self.count
+        # O limite pode ter baixado para menos que as vivas (controle de qualidade)
+        available = max(0, self.limit - start)
+        if count > available:
+            self.dropped += count - available
+            count = available
+        if count <= 0:
+            return
+        _, _, gravity, life = PARTICLE_KINDS[kind]
+        end = start + count
+        angles = np.radians(direction + self.rng.uniform(-spread / 2, spread / 2, count))
+        speeds = self.rng.uniform(0.3, 1.0, count) * speed
+        self.x[start:end] = x
+        self.y[start:end] = y
+        self.vx[start:end] = np.cos(angles) * speeds
+        self.vy[start:end] = np.sin(angles) * speeds
+        lifetimes = self.rng.uniform(0.6, 1.0, count) * life
+        self.life[start:end] = lifetimes
+        self.max_life[start:end] = lifetimes
+        self.gravity[start:end] = gravity
+        self.kind[start:end] = kind
+        self.count = end
+    
+    def clear(self):
+        """Remove todas as particulas."""
+        self.count = 0
+    
+    def update(self, dt):
+        """Move todas as particulas e remove as que acabaram."""
+        n = self.count
+        if n == 0:
+            return
+        step = dt * 60
+        damping = self.DAMPING ** step
+        vx, vy, life = self.vx[:n], self.vy[:n], self.life[:n]
+        vy += self.gravity[:n] * step
+        vx *= damping
+        vy *= damping
+        self.x[:n] += vx * step
+        self.y[:n] += vy * step
+        life -= dt
+        keep = life > 0
+        alive = int(keep.sum())
+        if alive < n:
+            for array in self.arrays:
+                array[:alive] = array[:n][keep]
+        self.count = alive
+    
+    def draw(self, surface):
+        """Desenha todas as particulas com um unico blits."""
+        n = self.count
+        if n == 0:
+            return
+        steps = self.FADE_STEPS
+        if self.sprites is None:
+            self.sprites = []
+            for kind in sorted(PARTICLE_KINDS):
+                color, radius, _, _ = PARTICLE_KINDS[kind]
+                for level in range(steps):
+                    sprite = pygame.Surface((radius * 2, radius * 2), pygame.SRCALPHA)
+                    pygame.draw.circle(sprite, color + (255 * (level + 1) // steps,), (radius, radius), radius)
+                    self.sprites.append(sprite)
+        kind = self.kind[:n]
+        level = np.minimum((self.life[:n] / self.max_life[:n] * steps).astype(np.int32), steps - 1)
+        index = (kind * steps + level).tolist()
+        radius = self.radius[kind]
+        xs = (self.x[:n] - radius).astype(np.int32).tolist()
+        ys = (self.y[:n] - radius).astype(np.int32).tolist()
+        sprites = self.sprites
+        surface.blits([(sprites[i], (x, y)) for i, x, y in zip(index, xs, ys)], False)
+
+
+class ParallaxLayer:
+    """Camada de fundo pre-renderizada que se repete na horizontal.
+    
+    factor e quanto a camada acompanha a camera (0 = parada) e drift e o
+    deslocamento proprio em pixels por segundo (nuvens). A imagem tem pelo
+    menos a largura da tela, entao bastam dois blits por frame. Camadas de
+    detalhe saem primeiro quando a qualidade baixa.
+    """
+    
+    def __init__(self, surface, y=0, factor=0.0, drift=0.0, detail=False):
+        if pygame.display.get_surface() is not None:
+            surface = surface.convert_alpha()
+        self.surface = surface
+        self.y = y
+        self.factor = factor
+        self.drift = drift
+        self.detail = detail
+    
+    def draw(self, target, camera_x, seconds):
+        """Desenha a camada deslocada pela camera e pelo tempo."""
+        width = self.surface.get_width()
+        offset = int(camera_x * self.factor + seconds * self.drift) % width
+        target.blit(self.surface, (-offset, self.y))
+        if width - offset < target.get_width():
+            target.blit(self.surface, (width - offset, self.y))
+
+
+def render_gradient(top_color, bottom_color, height=HEIGHT):
+    """Gradiente vertical do tamanho da tela."""
+    surface = pygame.Surface((WIDTH, height))
+    for y in range(height):
+        ratio = y / height
+        color = [int(a + (b - a) * ratio) for a, b in zip(top_color, bottom_color)]
+        pygame.draw.line(surface, color, (0, y), (WIDTH, y))
+    return surface
+
+
+def render_ridge(color, height, waves):
+    """Silhueta de morros repetivel: soma de senos com periodo igual a largura.
+    
+    waves e uma lista de (amplitude, repeticoes na largura, fase).
+    """
+    surface = pygame.Surface((WIDTH, height), pygame.SRCALPHA)
+    base = max(amplitude for amplitude, _, _ in waves)
+    points = [(0, height)]
+    for x in range(0, WIDTH + 1, 8):
+        offset = sum(amplitude * math.sin(2 * math.pi * repeats * x / WIDTH + phase) for amplitude, repeats, phase in waves)
+        points.append((x, base - offset))
+    points.append((WIDTH, height))
+    pygame.draw.polygon(surface, color, points)
+    return surface
+
+
+def render_clouds(color, clouds, height):
+    """Nuvens de circulos, desenhadas tambem uma largura ao lado para repetir sem emenda."""
+    surface = pygame.Surface((WIDTH, height), pygame.SRCALPHA)
+    for x, y, size in clouds:
+        for shift in (-WIDTH, 0, WIDTH):
+            cx = x + shift
+            pygame.draw.circle(surface, color, (cx, y), size)
+            pygame.draw.circle(surface, color, (cx + size * 0.7, y), size * 0.8)
+            pygame.draw.circle(surface, color, (cx - size * 0.7, y), size * 0.8)
+            pygame.draw.circle(surface, color, (cx, y - size * 0.5), size * 0.7)
+    return surface
+
+
+def render_pillars(color, height, spacing, width):
+    """Colunas de um salao ao fundo (sala do boss)."""
+    surface = pygame.Surface((WIDTH, height), pygame.SRCALPHA)
+    for x in range(spacing // 2, WIDTH, spacing):
+        pygame.draw.rect(surface, color, (x - width // 2, 30, width, height - 30))
+        pygame.draw.rect(surface, color, (x - width // 2 - 8, 20, width + 16, 14))
+        pygame.draw.rect(surface, color, (x - width // 2 - 8, height - 14, width + 16, 14))
+    return surface
+
+
+def build_backgrounds():
+    """Camadas de fundo de cada cena, do fundo para a frente."""
+    corridor = [
+        ParallaxLayer(render_gradient((135, 206, 250), (40, 44, 52))),
+        ParallaxLayer(render_ridge((90, 110, 150), 220, [(50, 2, 0.0), (25, 5, 1.3), (10, 11, 0.4)]), GROUND_Y - 220, 0.05),
+        ParallaxLayer(render_clouds((255, 255, 255), [(150, 100, 40), (400, 80, 50), (650, 120, 45), (250, 150, 35), (550, 140, 40)], 200), 0, 0.1, 8, detail=True),
+        ParallaxLayer(render_ridge((70, 120, 70), 120, [(30, 3, 0.7), (15, 7, 2.1)]), GROUND_Y - 100, 0.25),
+        ParallaxLayer(render_ridge((50, 95, 50), 50, [(12, 8, 0.3), (6, 19, 1.7)]), GROUND_Y - 40, 0.5),
+    ]
+    boss_room = [
+        ParallaxLayer(render_gradient((12, 8, 20), (35, 18, 28))),
+        ParallaxLayer(render_pillars((28, 22, 38), 420, 200, 40), GROUND_Y - 420, 0.08),
+        ParallaxLayer(render_clouds((90, 70, 110, 60), [(100, 380, 50), (380, 410, 60), (640, 390, 55)], 480), 0, 0.15, -12, detail=True),
+        ParallaxLayer(render_pillars((45, 32, 52), 300, 320, 56), GROUND_Y - 300, 0.3),
+    ]
+    return {GameState.PLAYING: corridor, GameState.BOSS_ROOM: boss_room}
+
+
 class Platform:
     """Classe para plataformas do jogo."""
     
@@ -458,6 +1482,198 @@ class Platform:
         return self.rect.bottom
 
 
+class PlatformGrid:
+    """Grade espacial de plataformas por colunas, para consultar so as proximas."""
+    
+    def __init__(self, platforms, cell_size=PLATFORM_GRID_CELL):
+        self.platforms = platforms
+        self.cell_size = cell_size
+        self.columns = {}
+        for platform in platforms:
+            first = int(platform.left // cell_size)
+            last = int((platform.right - 1) // cell_size)
+            for column in range(first, last + 1):
+                self.columns.setdefault(column, []).append(platform)
+    
+    def __iter__(self):
+        return iter(self.platforms)
+    
+    def __len__(self):
+        return len(self.platforms)
+    
+    def query(self, left, right):
+        """Plataformas que ocupam alguma coluna entre left e right."""
+        first = int(left // self.cell_size)
+        last = int(right // self.cell_size)
+        if first == last:
+            return self.columns.get(first, ())
+        found = []
+        for column in range(first, last + 1):
+            for platform in self.columns.get(column, ()):
+                if platform not in found:
+                    found.append(platform)
+        return found
+
+
+class NavGraph:
+    """Grafo de navegacao entre plataformas, montado uma vez por nivel.
+    
+    Cada no e uma plataforma (sem plataforma de chao, o chao entra como um no
+    a mais). As ligacoes sao tuplas (tipo, x de saida, x de chegada, destino,
+    subida, custo): andar para uma plataforma encostada na mesma altura, pular
+    para uma ao alcance do pulo e cair pela borda na primeira que estiver
+    embaixo. A rota de cada par de nos sai de um A* e fica guardada, junto com
+    a de cada no do caminho ate o mesmo destino; como o grafo nao muda durante
+    o nivel, cada agente so faz uma consulta de dict por tick.
+    """
+    
+    WALK, JUMP, DROP = range(3)
+    
+    def __init__(self, grid):
+        self.grid = grid
+        self.nodes = list(grid)
+        self.floor = next(
+            (i for i, platform in enumerate(self.nodes)
+             if platform.top == GROUND_Y and platform.left <= 0 and platform.right >= WIDTH),
+            None,
+        )
+        if self.floor is None:
+            self.floor = len(self.nodes)
+            self.nodes.append(Platform(0, GROUND_Y, WIDTH))
+        self.index = {platform: i for i, platform in enumerate(self.nodes)}
+        self.centers = [(platform.left + platform.right) / 2 for platform in self.nodes]
+        self.links = [self.build_links(i) for i in range(len(self.nodes))]
+        self.routes = {}
+    
+    def support(self, x, top):
+        """Primeiro no embaixo de top na coluna x (o chao, se nenhum outro)."""
+        found = None
+        for i, platform in enumerate(self.nodes):
+            if platform.top > top and platform.left <= x <= platform.right:
+                if found is None or platform.top < self.nodes[found].top:
+                    found = i
+        return found
+    
+    def build_links(self, a):
+        """Ligacoes que saem do no a."""
+        source = self.nodes[a]
+        margin = NAV_EDGE_MARGIN
+        links = []
+        for b, target in enumerate(self.nodes):
+            rise = source.top - target.top
+            if b == a or rise < 0 or rise > NAV_JUMP_HEIGHT:
+                continue
+            low = max(source.left, target.left)
+            high = min(source.right, target.right)
+            if low <= high and rise == 0:
+                # Encostadas na mesma altura: basta andar
+                side = 1 if target.right > source.right else -1
+                edge = source.right if side > 0 else source.left
+                links.append((self.WALK, edge, edge + side * margin, b, 0))
+            elif low <= high:
+                # Uma em cima da outra: pulo reto (as plataformas so seguram por cima)
+                middle = (low + high) / 2
+                links.append((self.JUMP, middle, middle, b, rise))
+            elif low - high <= NAV_JUMP_REACH:
+                # Vao entre as duas: pulo de borda a borda
+                if target.left >= source.right:
+                    links.append((self.JUMP, source.right - margin, target.left + margin, b, rise))
+                else:
+                    links.append((self.JUMP, source.left + margin, target.right - margin, b, rise))
+        for side in (-1, 1):
+            edge = source.left if side < 0 else source.right
+            fall_x = edge + side * margin
+            if 0 <= fall_x <= WIDTH:
+                below = self.support(fall_x, source.top)
+                if below is not None:
+                    links.append((self.DROP, edge, fall_x, below, source.top - self.nodes[below].top))
+        # Custo passando pelo centro dos nos: a estimativa do A* nunca passa dele
+        return [
+            link + (abs(self.centers[a] - link[1]) + abs(link[1] - link[2]) +
+                    abs(link[2] - self.centers[link[3]]) + abs(link[4]),)
+            for link in links
+        ]
+    
+    def estimate(self, a, b):
+        """Custo minimo de a ate b (distancia entre centros e alturas)."""
+        return abs(self.centers[a] - self.centers[b]) + abs(self.nodes[a].top - self.nodes[b].top)
+    
+    def route(self, start, goal):
+        """Ligacoes de start ate goal pelo A*, ou None se nao houver caminho."""
+        key = (start, goal)
+        if key in self.routes:
+            return self.routes[key]
+        best = {start: 0.0}
+        came_from = {start: None}
+        heap = [(self.estimate(start, goal), 0.0, start)]
+        while heap:
+            _, cost, node = heapq.heappop(heap)
+            if node == goal:
+                break
+            if cost > best[node]:
+                continue
+            for link in self.links[node]:
+                dest = link[3]
+                new_cost = cost + link[5]
+                if new_cost < best.get(dest, math.inf):
+                    best[dest] = new_cost
+                    came_from[dest] = (node, link)
+                    heapq.heappush(heap, (new_cost + self.estimate(dest, goal), new_cost, dest))
+        else:
+            self.routes[key] = None
+            return None
+        path = []
+        node = goal
+        while came_from[node] is not None:
+            node, link = came_from[node]
+            path.append(link)
+        path.reverse()
+        # Cada trecho final de um caminho minimo tambem e minimo
+        self.routes[key] = tuple(path)
+        for i in range(1, len(path)):
+            self.routes[(path[i - 1][3], goal)] = tuple(path[i:])
+        return self.routes[key]
+    
+    def next_link(self, start, goal):
+        """Proxima ligacao de start rumo a goal (None se ja chegou ou nao ha caminho)."""
+        path = self.routes.get((start, goal))
+        if path is None:
+            path = self.route(start, goal)
+        return path[0] if path else None
+    
+    def locate(self, x, feet):
+        """No onde estao apoiados os pes em (x, feet), ou None."""
+        if abs(feet - GROUND_Y) < 1:
+            return self.floor
+        for platform in self.grid.query(x, x):
+            if abs(platform.top - feet) < 1 and platform.left <= x <= platform.right:
+                return self.index[platform]
+        return None
+    
+    def landing(self, x, prev_feet, feet):
+        """Primeiro no cujo topo os pes cruzam descendo de prev_feet ate feet."""
+        found = self.floor if feet >= GROUND_Y else None
+        found_top = GROUND_Y
+        for platform in self.grid.query(x, x):
+            top = platform.top
+            if prev_feet <= top <= feet and platform.left <= x <= platform.right and (found is None or top < found_top):
+                found = self.index[platform]
+                found_top = top
+        return found
+
+
+def boss_room_platforms():
+    """Plataformas da sala do boss (o chao e a primeira)."""
+    return [
+        Platform(0, GROUND_Y, WIDTH, 20),  # Chao principal
+        Platform(100, GROUND_Y - 120, 180, 20),  # Plataforma esquerda (mais baixa)
+        Platform(520, GROUND_Y - 120, 180, 20),  # Plataforma direita (mais baixa)
+        Platform(200, GROUND_Y - 220, 140, 20),  # Plataforma superior esquerda
+        Platform(460, GROUND_Y - 220, 140, 20),  # Plataforma superior direita
+        Platform(310, GROUND_Y - 320, 180, 20),  # Plataforma central superior
+    ]
+
+
 class Button:
     """Classe para botoes do menu."""
     
@@ -474,112 +1690,1352 @@ class Button:
         """Verifica se o botao foi clicado."""
         return self.rect.collidepoint(pos)
     
-    def update_hover(self, pos):
-        """Atualiza estado de hover."""
-        self.hovered = self.rect.collidepoint(pos)
+    def update_hover(self, pos):
+        """Atualiza estado de hover."""
+        self.hovered = self.rect.collidepoint(pos)
+    
+    def draw(self, screen):
+        """Desenha o botao."""
+        color = (100, 150, 200) if self.hovered else (70, 120, 170)
+        border_color = (150, 200, 255) if self.hovered else (100, 150, 200)
+        
+        screen.draw.filled_rect(self.rect, color)
+        screen.draw.rect(self.rect, border_color)
+        
+        screen.draw.text(
+            self.text,
+            center=(self.x, self.y),
+            fontsize=24,
+            color="white",
+            shadow=(1, 1),
+            scolor="black"
+        )
+
+
+class QualityGovernor:
+    """Escolhe o nivel de QUALITY_LEVELS pelo tempo medio de trabalho por frame.
+    
+    Piora um nivel quando a media dos ultimos WINDOW frames passa de DOWN do
+    orcamento e melhora um nivel so depois de UP_FRAMES frames seguidos abaixo
+    de UP (histerese). Depois de cada troca espera COOLDOWN frames, para
+    medir o efeito antes de decidir de novo.
+    """
+    
+    BUDGET = 1 / 60
+    WINDOW = 30
+    DOWN = 0.9
+    UP = 0.5
+    UP_FRAMES = 180
+    COOLDOWN = 60
+    
+    def __init__(self, level=0, adaptive=True):
+        self.level = level
+        self.adaptive = adaptive
+        self.reset()
+    
+    def reset(self):
+        """Esquece as medidas (depois de uma troca de nivel)."""
+        self.times = [0.0] * self.WINDOW
+        self.index = 0
+        self.total = 0.0
+        self.filled = 0
+        self.fast_frames = 0
+        self.cooldown = self.COOLDOWN
+    
+    def record(self, seconds):
+        """Registra um frame; retorna True se o nivel mudou."""
+        if not self.adaptive:
+            return False
+        self.total += seconds - self.times[self.index]
+        self.times[self.index] = seconds
+        self.index = (self.index + 1) % self.WINDOW
+        self.filled = min(self.filled + 1, self.WINDOW)
+        if self.cooldown > 0:
+            self.cooldown -= 1
+            return False
+        if self.filled < self.WINDOW:
+            return False
+        average = self.total / self.WINDOW
+        if average > self.BUDGET * self.DOWN and self.level < len(QUALITY_LEVELS) - 1:
+            self.level += 1
+            self.reset()
+            return True
+        self.fast_frames = self.fast_frames + 1 if average < self.BUDGET * self.UP else 0
+        if self.fast_frames >= self.UP_FRAMES and self.level > 0:
+            self.level -= 1
+            self.reset()
+            return True
+        return False
+    
+    @property
+    def average(self):
+        """Media atual em segundos."""
+        return self.total / max(1, self.filled)
+
+
+class ViewSurface:
+    """Surface em resolucao reduzida que aceita coordenadas da tela logica.
+    
+    Os sprites e camadas de fundo sao reduzidos uma vez (smoothscale) e
+    guardados em cache; depois cada blit so escala a posicao. Serve para
+    Surfaces que nao mudam depois de criados.
+    """
+    
+    def __init__(self, surface, scale):
+        self.surface = surface
+        self.scale = scale
+        self.cache = weakref.WeakKeyDictionary()  # Surface original -> reduzido
+    
+    def get_width(self):
+        return WIDTH
+    
+    def get_height(self):
+        return HEIGHT
+    
+    def get_size(self):
+        return WIDTH, HEIGHT
+    
+    def scaled(self, source):
+        """Copia reduzida de source, com a mesma transparencia de agora."""
+        copy = self.cache.get(source)
+        if copy is None:
+            width, height = source.get_size()
+            size = (max(1, round(width * self.scale)), max(1, round(height * self.scale)))
+            try:
+                copy = pygame.transform.smoothscale(source, size)
+            except ValueError:
+                copy = pygame.transform.scale(source, size)  # smoothscale so com 24/32 bits
+            self.cache[source] = copy
+        alpha = source.get_alpha()
+        if copy.get_alpha() != alpha:
+            copy.set_alpha(alpha)  # Jogador piscando (draw_sprite)
+        return copy
+    
+    def blit(self, source, dest):
+        scale = self.scale
+        return self.surface.blit(self.scaled(source), (int(dest[0] * scale), int(dest[1] * scale)))
+    
+    def blits(self, sequence, doreturn=True):
+        scale = self.scale
+        scaled = self.scaled
+        return self.surface.blits([(scaled(source), (int(x * scale), int(y * scale))) for source, (x, y) in sequence], doreturn)
+    
+    def fill(self, color):
+        self.surface.fill(color)
+
+
+class ScaledPainter:
+    """screen.draw do PgZero com as coordenadas da tela logica reduzidas."""
+    
+    # Argumentos de posicao do texto (ptext)
+    TEXT_POINTS = ("pos", "topleft", "bottomleft", "topright", "bottomright",
+                   "midtop", "midleft", "midbottom", "midright", "center")
+    TEXT_VALUES = ("top", "left", "bottom", "right", "centerx", "centery", "width")
+    
+    def __init__(self, painter, scale):
+        self.painter = painter
+        self.scale = scale
+    
+    def point(self, pos):
+        return (pos[0] * self.scale, pos[1] * self.scale)
+    
+    def rect(self, rect, color):
+        self.painter.rect(self.scaled_rect(rect), color)
+    
+    def filled_rect(self, rect, color):
+        self.painter.filled_rect(self.scaled_rect(rect), color)
+    
+    def scaled_rect(self, rect):
+        scale = self.scale
+        left, top = round(rect[0] * scale), round(rect[1] * scale)
+        return Rect(left, top, max(1, round((rect[0] + rect[2]) * scale) - left), max(1, round((rect[1] + rect[3]) * scale) - top))
+    
+    def line(self, start, end, color):
+        self.painter.line(self.point(start), self.point(end), color)
+    
+    def circle(self, pos, radius, color):
+        self.painter.circle(self.point(pos), max(1, round(radius * self.scale)), color)
+    
+    def filled_circle(self, pos, radius, color):
+        self.painter.filled_circle(self.point(pos), max(1, round(radius * self.scale)), color)
+    
+    def text(self, text, pos=None, **kwargs):
+        if pos is not None:
+            kwargs["pos"] = pos
+        for name in self.TEXT_POINTS:
+            if kwargs.get(name) is not None:
+                kwargs[name] = self.point(kwargs[name])
+        for name in self.TEXT_VALUES:
+            if kwargs.get(name) is not None:
+                kwargs[name] = kwargs[name] * self.scale
+        kwargs["fontsize"] = max(1, round((kwargs.get("fontsize") or 24) * self.scale))
+        self.painter.text(text, **kwargs)
+
+
+class ViewScreen:
+    """Tela com a mesma interface do screen do PgZero, em resolucao interna menor.
+    
+    O jogo desenha com as coordenadas de sempre (WIDTH x HEIGHT) e tudo cai
+    num Surface scale vezes menor; present() amplia o resultado para a tela
+    com um unico scale (ou smoothscale).
+    """
+    
+    def __init__(self, scale, smooth=SMOOTH_SCALE):
+        self.scale = scale
+        self.smooth = smooth
+        canvas = pygame.Surface((max(1, round(WIDTH * scale)), max(1, round(HEIGHT * scale))))
+        if pygame.display.get_surface() is not None:
+            canvas = canvas.convert()  # Mesmo formato da janela: ampliacao sem conversao
+        self.canvas = canvas
+        self.surface = ViewSurface(canvas, scale)
+        self.draw = ScaledPainter(Screen(canvas).draw, scale)
+    
+    def fill(self, color):
+        self.canvas.fill(color)
+    
+    def present(self, target):
+        """Amplia o frame para o Surface da tela."""
+        if self.smooth:
+            pygame.transform.smoothscale(self.canvas, target.get_size(), target)
+        else:
+            pygame.transform.scale(self.canvas, target.get_size(), target)
+
+
+class Hud:
+    """HUD (vidas, ondas, barra do boss) pre-desenhado num unico Surface.
+    
+    A cada frame so compara a chave com os valores exibidos; o Surface so e
+    redesenhado quando ela muda, e vai para a tela com um blit.
+    """
+    
+    HEIGHT = 120  # Faixa do topo da tela ocupada pelo HUD
+    
+    def __init__(self):
+        self.surface = pygame.Surface((WIDTH, self.HEIGHT), pygame.SRCALPHA)
+        self.screen = Screen(self.surface)
+        self.key = None
+        self.renders = 0  # Quantas vezes o HUD foi redesenhado
+    
+    def refresh(self, key, render):
+        """Redesenha com render(screen) se a chave mudou."""
+        if key != self.key:
+            self.key = key
+            self.surface.fill((0, 0, 0, 0))
+            render(self.screen)
+            self.renders += 1
+    
+    def draw(self, target):
+        """Copia o HUD para a tela."""
+        target.blit(self.surface, (0, 0))
+
+
+class BossHealthBar:
+    """Barra de vida do boss (estilo Dark Souls) com rastro do dano recente.
+    
+    Moldura e nome sao desenhados so quando o HUD e redesenhado; depois disso
+    paint() pinta de novo apenas as colunas da barra que mudaram de cor.
+    """
+    
+    X = (WIDTH - 400) // 2
+    Y = 30
+    WIDTH = 400
+    HEIGHT = 40
+    TRAIL_DELAY = 0.4  # Segundos parado antes do rastro comecar a encolher
+    TRAIL_SPEED = 0.6  # Fracao da vida maxima que o rastro encolhe por segundo
+    FILL_COLOR = (200, 0, 0)
+    TRAIL_COLOR = (255, 190, 70)
+    EMPTY_COLOR = (100, 0, 0)
+    
+    def __init__(self, boss):
+        self.max_health = boss.max_health
+        self.health = boss.health
+        self.trail = boss.health  # Vida mostrada pelo rastro (>= health)
+        self.trail_timer = 0.0
+        self.painted = None  # Larguras (vida, rastro) ja pintadas, None = pintar tudo
+    
+    def update(self, dt, health):
+        """Acompanha a vida do boss e anima o rastro."""
+        if health < self.health:
+            self.trail_timer = self.TRAIL_DELAY
+        self.health = health
+        if self.trail <= health:
+            self.trail = health
+        elif self.trail_timer > 0:
+            self.trail_timer -= dt
+        else:
+            self.trail = max(health, self.trail - self.max_health * self.TRAIL_SPEED * dt)
+    
+    def width(self, value):
+        """Largura em pixels de um valor de vida."""
+        return max(0, min(self.WIDTH, int(self.WIDTH * value / self.max_health)))
+    
+    def draw_frame(self, screen, name):
+        """Desenha a moldura e o nome (partes fixas)."""
+        bar_x, bar_y, bar_width, bar_height = self.X, self.Y, self.WIDTH, self.HEIGHT
+        # Background da barra (preto)
+        screen.draw.filled_rect(Rect(bar_x - 4, bar_y - 4, bar_width + 8, bar_height + 8), (0, 0, 0))
+        # Borda dourada
+        screen.draw.line((bar_x, bar_y), (bar_x + bar_width, bar_y), (255, 215, 0))
+        screen.draw.line((bar_x, bar_y), (bar_x, bar_y + bar_height), (255, 215, 0))
+        screen.draw.line((bar_x + bar_width, bar_y), (bar_x + bar_width, bar_y + bar_height), (255, 215, 0))
+        screen.draw.line((bar_x, bar_y + bar_height), (bar_x + bar_width, bar_y + bar_height), (255, 215, 0))
+        # Nome do boss
+        screen.draw.text(
+            name,
+            center=(WIDTH // 2, bar_y + bar_height + 25),
+            fontsize=28,
+            color=(255, 215, 0),
+            shadow=(2, 2),
+            scolor="black"
+        )
+        self.painted = None
+    
+    def paint(self, surface):
+        """Pinta as colunas que mudaram desde a ultima pintura."""
+        health_width = self.width(self.health)
+        trail_width = max(health_width, self.width(self.trail))
+        if self.painted == (health_width, trail_width):
+            return
+        if self.painted is None:
+            start, end = 0, self.WIDTH
+        else:
+            old_health, old_trail = self.painted
+            start, end = min(old_health, health_width), max(old_trail, trail_width)
+        self.painted = (health_width, trail_width)
+        for left, right, color in (
+            (0, health_width, self.FILL_COLOR),
+            (health_width, trail_width, self.TRAIL_COLOR),
+            (trail_width, self.WIDTH, self.EMPTY_COLOR),
+        ):
+            # Interior da moldura: a primeira coluna e as linhas da borda ficam intactas
+            left, right = max(left, start, 1), min(right, end)
+            if right > left:
+                surface.fill(color, (self.X + left, self.Y + 1, right - left, self.HEIGHT - 1))
+
+
+class VirtualKeyboard:
+    """Teclado falso com as mesmas teclas que o jogo le do teclado do PgZero."""
+    
+    def __init__(self):
+        self.clear()
+    
+    def clear(self):
+        """Solta todas as teclas."""
+        self.left = False
+        self.right = False
+        self.up = False
+        self.space = False
+        self.x = False  # Ataque
+        self.c = False  # Tiro
+        self.r = False  # Voltar no tempo
+
+
+class Controller:
+    """Interface para quem controla o jogador."""
+    
+    autoplay = False  # Recomecar partidas sozinho
+    
+    def poll(self, game, dt):
+        """Retorna o teclado (real ou virtual) a ser usado neste tick."""
+        raise NotImplementedError
+    
+    def on_game_end(self, game):
+        """Chamado quando uma partida termina (vitoria ou game over)."""
+        pass
+
+
+class BotController(Controller):
+    """Controla o jogador com uma politica de bot atraves de um teclado virtual.
+    
+    A politica recebe (game, keyboard, rng) e aperta as teclas do teclado
+    virtual; apertar x dispara Player.attack() como a tecla X de verdade.
+    """
+    
+    def __init__(self, policy, seed=None, autoplay=False):
+        self.policy = policy
+        self.rng = random.Random(seed)
+        self.keyboard = VirtualKeyboard()
+        self.autoplay = autoplay
+        self.attack_held = False
+        self.shot_held = False
+        self.games = 0
+        self.wins = 0
+    
+    def poll(self, game, dt):
+        self.policy(game, self.keyboard, self.rng)
+        # Ataque so na borda de descida da tecla, igual ao on_key_down
+        if self.keyboard.x and not self.attack_held:
+            game.player.attack()
+        self.attack_held = self.keyboard.x
+        if self.keyboard.c and not self.shot_held:
+            game.player_shoot()
+        self.shot_held = self.keyboard.c
+        return self.keyboard
+    
+    def on_game_end(self, game):
+        self.games += 1
+        if game.state == GameState.VICTORY:
+            self.wins += 1
+        if self.autoplay:
+            print(f"[bot] partida {self.games}: {game.state} (vitorias: {self.wins}/{self.games})")
+
+
+def pick_bot_target(game):
+    """Retorna o alvo mais proximo do jogador (inimigo vivo ou boss)."""
+    if game.boss and game.boss.alive:
+        return game.boss
+    alive = [e for e in game.enemies if e.alive]
+    if not alive:
+        return None
+    return min(alive, key=lambda e: abs(e.x - game.player.x))
+
+
+def scripted_policy(game, keyboard, rng):
+    """Aproxima, ataca e recua quando o alvo chega perto demais."""
+    player = game.player
+    keyboard.clear()
+    target = pick_bot_target(game)
+    if target is None:
+        # Nenhum inimigo: ir para o portal
+        keyboard.right = True
+        return
+    dx = target.x - player.x
+    distance = abs(dx)
+    facing_target = (dx > 0) == player.facing_right
+    if distance < 20:
+        # Perto demais: recuar
+        keyboard.left = dx > 0
+        keyboard.right = dx < 0
+    elif distance > ATTACK_RANGE * 0.8 or not facing_target:
+        keyboard.right = dx > 0
+        keyboard.left = dx < 0
+    elif not player.is_attacking:
+        keyboard.x = True
+
+
+def random_policy(game, keyboard, rng):
+    """Aperta teclas aleatorias, mantendo cada escolha por alguns ticks."""
+    if rng.random() < 0.1:
+        keyboard.clear()
+        move = rng.choice(("left", "right", "right", None))
+        if move:
+            setattr(keyboard, move, True)
+        keyboard.up = rng.random() < 0.1
+    keyboard.x = rng.random() < 0.15
+
+
+BOT_POLICIES = {
+    "scripted": scripted_policy,
+    "random": random_policy,
+}
+
+
+class AnimationSet:
+    """Tabela de frames pre-calculada de um personagem.
+    
+    timelines[estado][direcao] tem uma entrada (surface, meia largura,
+    meia altura) por tick do ciclo da animacao; achar o frame atual e so
+    tick % len(timeline). direcao e 0 para esquerda e 1 para direita.
+    """
+    
+    def __init__(self, states, frames):
+        """states vem de ANIMATIONS; frames mapeia nome -> (direita, esquerda)."""
+        self.timelines = [None] * (ANIM_HIT + 1)
+        for state, (names, seconds) in states.items():
+            ticks_per_frame = max(1, int(round(seconds * 60)))
+            # frames guarda (direita, esquerda); as timelines ficam (esquerda, direita)
+            self.timelines[state] = tuple(
+                self.build_timeline([frames[name][side] for name in names], ticks_per_frame)
+                for side in (1, 0)
+            )
+        # Estados sem sprites proprios usam a caminhada (ou o parado)
+        fallback = self.timelines[ANIM_WALK] or self.timelines[ANIM_IDLE]
+        for state in range(len(self.timelines)):
+            if self.timelines[state] is None:
+                self.timelines[state] = fallback
+    
+    @staticmethod
+    def build_timeline(surfaces, ticks_per_frame):
+        """Uma entrada por tick: cada frame se repete ticks_per_frame vezes."""
+        timeline = []
+        for surface in surfaces:
+            entry = (surface, surface.get_width() // 2, surface.get_height() // 2)
+            timeline.extend([entry] * ticks_per_frame)
+        return tuple(timeline)
+
+
+class SpriteCache:
+    """Cache em disco de sprites escalados e espelhados, em pixels RGBA crus.
+    
+    A chave e o hash do PNG de origem junto com SPRITE_SCALE, entao qualquer
+    mudanca em um dos dois invalida a entrada automaticamente.
+    """
+    
+    HEADER = struct.Struct("<4sHHH")  # magic, versao, largura, altura
+    MAGIC = b"ETSC"
+    
+    def __init__(self, folder=SPRITE_CACHE_DIR, scale=SPRITE_SCALE, enabled=SPRITE_CACHE_ENABLED):
+        self.folder = folder
+        self.scale = scale
+        self.enabled = enabled
+        self.hits = 0
+        self.misses = 0
+    
+    def cache_path(self, path, data):
+        """Caminho do arquivo de cache para o conteudo de um PNG."""
+        digest = hashlib.sha1(data)
+        digest.update(f"{self.scale!r}:{SPRITE_CACHE_VERSION}".encode())
+        name = os.path.splitext(os.path.basename(path))[0]
+        return os.path.join(self.folder, f"{name}-{digest.hexdigest()[:16]}.rgba")
+    
+    def load_pair(self, path):
+        """Retorna (sprite_direita, sprite_esquerda) ja escalados."""
+        with open(path, "rb") as f:
+            data = f.read()
+        cached = None
+        if self.enabled:
+            cached_path = self.cache_path(path, data)
+            cached = self.read(cached_path)
+        if cached is not None:
+            self.hits += 1
+            return cached
+        self.misses += 1
+        img = pygame.image.load(path).convert_alpha()
+        new_width = int(img.get_width() * self.scale)
+        new_height = int(img.get_height() * self.scale)
+        right = pygame.transform.scale(img, (new_width, new_height))
+        left = pygame.transform.flip(right, True, False)
+        if self.enabled:
+            self.write(cached_path, right, left)
+        return right, left
+    
+    def read(self, cached_path):
+        """Le os dois sprites crus direto para Surfaces (sem decodificar PNG)."""
+        try:
+            with open(cached_path, "rb") as f:
+                data = f.read()
+        except OSError:
+            return None
+        if len(data) < self.HEADER.size:
+            return None
+        magic, version, width, height = self.HEADER.unpack_from(data)
+        frame_size = width * height * 4
+        if magic != self.MAGIC or version != SPRITE_CACHE_VERSION or len(data) != self.HEADER.size + 2 * frame_size:
+            return None
+        view = memoryview(data)
+        start = self.HEADER.size
+        right = pygame.image.frombuffer(view[start:start + frame_size], (width, height), "RGBA").convert_alpha()
+        left = pygame.image.frombuffer(view[start + frame_size:], (width, height), "RGBA").convert_alpha()
+        return right, left
+    
+    def write(self, cached_path, right, left):
+        """Grava os sprites processados e remove versoes antigas do mesmo PNG."""
+        width, height = right.get_size()
+        try:
+            os.makedirs(self.folder, exist_ok=True)
+            prefix = os.path.basename(cached_path).rsplit("-", 1)[0] + "-"
+            for old in os.listdir(self.folder):
+                if old.startswith(prefix) and old.endswith(".rgba"):
+                    os.remove(os.path.join(self.folder, old))
+            temp_path = cached_path + ".tmp"
+            with open(temp_path, "wb") as f:
+                f.write(self.HEADER.pack(self.MAGIC, SPRITE_CACHE_VERSION, width, height))
+                f.write(pygame.image.tobytes(right, "RGBA"))
+                f.write(pygame.image.tobytes(left, "RGBA"))
+            os.replace(temp_path, cached_path)
+        except OSError as e:
+            print(f"Nao foi possivel gravar o cache de sprites: {e}")
+            self.enabled = False
+
+
+class SoundBank:
+    """Efeitos sonoros pre-carregados em canais reservados com limite de vozes."""
+    
+    def __init__(self, effects=SOUND_EFFECTS):
+        self.effects = effects
+        self.sounds = {}
+        self.channels = {}
+        self.next_voice = {}
+        self.played_this_frame = set()
+        self.dropped = 0  # Efeitos descartados por falta de voz
+        self.stolen = 0  # Vozes interrompidas para tocar um efeito novo
+    
+    def find_file(self, name):
+        """Procura o arquivo do efeito nas pastas de som."""
+        for folder in SOUND_DIRS:
+            for ext in SOUND_EXTENSIONS:
+                path = resource_path(os.path.join(folder, name + ext))
+                if os.path.exists(path):
+                    return path
+        return None
+    
+    def load(self):
+        """Decodifica todos os efeitos uma unica vez e reserva os canais do mixer."""
+        if not pygame.mixer.get_init():
+            return
+        total_voices = sum(voices for voices, _, _ in self.effects.values())
+        if pygame.mixer.get_num_channels() < total_voices + 4:
+            pygame.mixer.set_num_channels(total_voices + 4)
+        # Canais reservados nao sao usados pelo Sound.play() automatico
+        pygame.mixer.set_reserved(total_voices)
+        channel_id = 0
+        for name, (voices, volume, _) in self.effects.items():
+            first_channel = channel_id
+            channel_id += voices
+            path = self.find_file(name)
+            if path is None:
+                continue
+            try:
+                sound = pygame.mixer.Sound(path)
+            except pygame.error as e:
+                print(f"Erro ao carregar som {name}: {e}")
+                continue
+            sound.set_volume(volume)
+            self.sounds[name] = sound
+            self.channels[name] = [pygame.mixer.Channel(i) for i in range(first_channel, channel_id)]
+            self.next_voice[name] = 0
+    
+    def begin_frame(self):
+        """Libera o limite de um disparo por efeito a cada frame."""
+        self.played_this_frame.clear()
+    
+    def play(self, name):
+        """Toca um efeito respeitando o limite de vozes. Retorna True se tocou."""
+        sound = self.sounds.get(name)
+        if sound is None:
+            return False
+        # Varios hits no mesmo frame viram um unico som
+        if name in self.played_this_frame:
+            self.dropped += 1
+            return False
+        channels = self.channels[name]
+        # Round-robin: a proxima voz e sempre a que comecou a tocar ha mais tempo
+        index = self.next_voice[name]
+        channel = channels[index]
+        if channel.get_busy():
+            idle = [c for c in channels if not c.get_busy()]
+            if idle:
+                channel = idle[0]
+            elif self.effects[name][2]:
+                self.stolen += 1
+            else:
+                self.dropped += 1
+                return False
+        channel.play(sound)
+        self.next_voice[name] = (index + 1) % len(channels)
+        self.played_this_frame.add(name)
+        return True
+
+
+class Snapshot:
+    """Formato binario do estado da partida: registros struct de tamanho fixo.
+    
+    Ordem: cabecalho, jogador, inimigos, boss (se houver) e projeteis. Nao
+    guarda nada que seja so visual (particulas, rastro da barra do boss).
+    """
+    
+    MAGIC = b"ETGS"
+    VERSION = 2
+    STATES = (
+        GameState.LOADING, GameState.MENU, GameState.INSTRUCTIONS, GameState.PLAYING,
+        GameState.BOSS_ROOM, GameState.GAME_OVER, GameState.VICTORY,
+    )
+    # magic, versao, estado, onda, total de ondas, timer de spawn, saida trancada,
+    # tempo de cena, inimigos, tem boss, projeteis
+    HEADER = struct.Struct("<4sHBBBd?dH?H")
+    # x, y, vx, vy, direita, no chao, vidas, invencivel, timer, atacando, timer,
+    # ja acertou, recarga do tiro, hit, timer do hit, estado e tick da animacao
+    PLAYER = struct.Struct("<dddd??b?d?d?d?dBI")
+    # x, y, vx, vy, patrulha esq/dir, direita, vivo, hit, timer do hit, animacao,
+    # cacador (Hunter)
+    ENEMY = struct.Struct("<dddddd???dBI?")
+    # x, y, vx, vy, direita, vida, vida maxima, recarga do ataque, perseguindo,
+    # velocidade, fase/passo/tempo do script, ultima vida vista, aviso, hit,
+    # timer do hit, animacao
+    BOSS = struct.Struct("<dddd?hhd?dBHHh??dBI")
+    # x, y, vx, vy, vida restante, lado
+    PROJECTILE = struct.Struct("<dddddB")
+    
+    @classmethod
+    def pack(cls, game, include_projectiles=True):
+        """Serializa a partida."""
+        world = game.world
+        player = game.player
+        enemies = [enemy for enemy in game.enemies if enemy.alive]
+        boss = game.boss if game.boss is not None and game.boss.alive else None
+        projectiles = game.projectiles if include_projectiles else ()
+        parts = [cls.HEADER.pack(
+            cls.MAGIC, cls.VERSION, cls.STATES.index(game.state),
+            game.current_wave, game.total_waves, game.enemy_spawn_timer, game.exit_locked,
+            game.scene_time, len(enemies), boss is not None, len(projectiles),
+        )]
+        eid = player.eid
+        parts.append(cls.PLAYER.pack(
+            world.x[eid], world.y[eid], world.vx[eid], world.vy[eid], world.facing[eid],
+            player.on_ground, player.lives, player.invincible, player.invincible_timer,
+            world.attacking[eid], player.attack_timer, player.attack_hit_this_frame, player.shot_timer,
+            world.hit_active[eid], world.hit_timer[eid], world.anim_state[eid], world.anim_tick[eid],
+        ))
+        for enemy in enemies:
+            eid = enemy.eid
+            parts.append(cls.ENEMY.pack(
+                world.x[eid], world.y[eid], world.vx[eid], world.vy[eid],
+                world.patrol_left[eid], world.patrol_right[eid],
+                world.facing[eid], world.alive[eid], world.hit_active[eid], world.hit_timer[eid],
+                world.anim_state[eid], world.anim_tick[eid], isinstance(enemy, Hunter),
+            ))
+        if boss is not None:
+            eid = boss.eid
+            parts.append(cls.BOSS.pack(
+                world.x[eid], world.y[eid], world.vx[eid], world.vy[eid], world.facing[eid],
+                world.health[eid], world.max_health[eid], world.attack_cooldown[eid],
+                world.chase_active[eid], world.chase_speed[eid],
+                world.script_phase[eid], world.script_step[eid], world.script_clock[eid],
+                world.script_health[eid], world.telegraph[eid],
+                world.hit_active[eid], world.hit_timer[eid], world.anim_state[eid], world.anim_tick[eid],
+            ))
+        for i in range(len(projectiles)):
+            parts.append(cls.PROJECTILE.pack(
+                projectiles.x[i], projectiles.y[i], projectiles.vx[i], projectiles.vy[i],
+                projectiles.life[i], projectiles.team[i],
+            ))
+        return b"".join(parts)
+    
+    @classmethod
+    def restore(cls, game, data):
+        """Volta a partida ao estado de pack(); ValueError se os dados forem invalidos.
+        
+        Roda a cada frame do rewind, entao reaproveita o que ja existe: o
+        World, o jogador, os inimigos e o boss sao sobrescritos no lugar (so
+        a diferenca de quantidade cria ou remove entidades), os pools de
+        projeteis e particulas so sao esvaziados, o grafo de navegacao so e
+        refeito ao trocar de sala e as estatisticas da partida ficam.
+        """
+        try:
+            (magic, version, state, wave, total_waves, spawn_timer, exit_locked,
+             scene_time, enemy_count, has_boss, projectile_count) = cls.HEADER.unpack_from(data, 0)
+        except struct.error as e:
+            raise ValueError(f"snapshot invalido: {e}")
+        if magic != cls.MAGIC or version != cls.VERSION:
+            raise ValueError("snapshot de outra versao")
+        expected = (cls.HEADER.size + cls.PLAYER.size + enemy_count * cls.ENEMY.size +
+                    has_boss * cls.BOSS.size + projectile_count * cls.PROJECTILE.size)
+        if len(data) != expected:
+            raise ValueError(f"snapshot com {len(data)} bytes, esperado {expected}")
+        
+        game.state = cls.STATES[state]
+        game.current_wave = wave
+        game.total_waves = total_waves
+        game.enemy_spawn_timer = spawn_timer
+        game.exit_locked = exit_locked
+        game.scene_time = scene_time
+        world = game.world
+        offset = cls.HEADER.size
+        
+        player = game.player
+        eid = player.eid
+        (world.x[eid], world.y[eid], world.vx[eid], world.vy[eid], world.facing[eid],
+         player.on_ground, player.lives, player.invincible, player.invincible_timer,
+         world.attacking[eid], player.attack_timer, player.attack_hit_this_frame, player.shot_timer,
+         world.hit_active[eid], world.hit_timer[eid], world.anim_state[eid], world.anim_tick[eid],
+         ) = cls.PLAYER.unpack_from(data, offset)
+        offset += cls.PLAYER.size
+        
+        # Inimigos existentes do mesmo tipo sao reaproveitados, na ordem
+        enemies = [enemy for enemy in game.enemies if enemy.world is world and enemy.eid in world.members["enemy"]]
+        game.enemies = []
+        for _ in range(enemy_count):
+            record = cls.ENEMY.unpack_from(data, offset)
+            offset += cls.ENEMY.size
+            kind = Hunter if record[-1] else Enemy
+            if enemies and type(enemies[0]) is kind:
+                enemy = enemies.pop(0)
+                if kind is Hunter:
+                    world.grounded[enemy.eid] = False  # Pousa de novo na posicao restaurada
+            elif kind is Hunter:
+                enemy = Hunter(record[0], record[1], world)
+            else:
+                enemy = Enemy(record[0], record[1], record[4], record[5], world)
+            eid = enemy.eid
+            (world.x[eid], world.y[eid], world.vx[eid], world.vy[eid],
+             world.patrol_left[eid], world.patrol_right[eid],
+             world.facing[eid], world.alive[eid], world.hit_active[eid], world.hit_timer[eid],
+             world.anim_state[eid], world.anim_tick[eid]) = record[:-1]
+            game.enemies.append(enemy)
+        for enemy in enemies:
+            enemy.destroy()
+        
+        # Plataformas so mudam ao atravessar a porta do boss
+        in_boss_room = game.state == GameState.BOSS_ROOM
+        if in_boss_room != bool(game.platforms):
+            game.set_platforms(boss_room_platforms() if in_boss_room else [])
+        boss = game.boss
+        if boss is not None and (boss.world is not world or boss.eid not in world.members["chase"]):
+            boss = None  # De uma partida anterior
+        if boss is not None and not has_boss:
+            boss.destroy()
+            boss = None
+        if boss is None:
+            game.boss = game.boss_bar = None
+        if has_boss:
+            record = cls.BOSS.unpack_from(data, offset)
+            offset += cls.BOSS.size
+            if boss is None:
+                boss = game.boss = Boss(record[0], record[1], world)
+                game.boss_bar = BossHealthBar(boss)
+            eid = boss.eid
+            world.alive[eid] = True
+            world.grounded[eid] = False  # Pousa de novo na plataforma restaurada
+            (world.x[eid], world.y[eid], world.vx[eid], world.vy[eid], world.facing[eid],
+             world.health[eid], world.max_health[eid], world.attack_cooldown[eid],
+             world.chase_active[eid], world.chase_speed[eid],
+             world.script_phase[eid], world.script_step[eid], world.script_clock[eid],
+             world.script_health[eid], world.telegraph[eid],
+             world.hit_active[eid], world.hit_timer[eid], world.anim_state[eid], world.anim_tick[eid],
+             ) = record
+        # Os cacadores ja vieram se a vida restaurada passou do limite
+        game.reinforcements_called = has_boss and game.boss.health <= game.boss.max_health * BOSS_REINFORCEMENT_HEALTH
+        
+        projectiles = game.projectiles
+        projectiles.clear()
+        game.particles.clear()
+        for _ in range(projectile_count):
+            x, y, vx, vy, life, team = cls.PROJECTILE.unpack_from(data, offset)
+            offset += cls.PROJECTILE.size
+            projectiles.spawn(x, y, vx, vy, -1, team)
+            projectiles.life[len(projectiles) - 1] = life
+
+
+class RewindBuffer:
+    """Historico dos ultimos segundos da partida, um snapshot por tick.
+    
+    Os snapshots (sem projeteis) ficam num bytearray pre-alocado usado como
+    anel. A cada KEYFRAME_INTERVAL ticks vai um snapshot inteiro; nos outros
+    so o XOR com o keyframe, comprimido com zlib (quase tudo zero). O indice
+    tambem e um anel de tamanho fixo. Quando falta espaco os mais antigos
+    saem, e um keyframe sai junto com os deltas que dependem dele.
+    """
+    
+    KEYFRAME_INTERVAL = 30
+    
+    def __init__(self, seconds=REWIND_SECONDS, arena_bytes=REWIND_ARENA_BYTES):
+        self.arena = bytearray(arena_bytes)
+        self.slots = int(seconds * 60)
+        self.starts = [0] * self.slots
+        self.sizes = [0] * self.slots
+        self.keys = [0] * self.slots  # Slot do keyframe de cada entrada (ele mesmo se for keyframe)
+        self.clear()
+    
+    def __len__(self):
+        return self.count
+    
+    def clear(self):
+        """Esquece todo o historico."""
+        self.first = 0  # Slot mais antigo
+        self.count = 0
+        self.write_pos = 0
+        self.key_slot = -1
+        self.key_data = None
+        self.since_key = 0
+    
+    def drop_oldest(self):
+        """Remove a entrada mais antiga (e, se for keyframe, os seus deltas)."""
+        slot = self.first
+        self.first = (self.first + 1) % self.slots
+        self.count -= 1
+        while self.count and self.keys[self.first] == slot:
+            self.first = (self.first + 1) % self.slots
+            self.count -= 1
+        if slot == self.key_slot:
+            # O keyframe atual saiu: o proximo registro comeca outro
+            self.key_slot = -1
+            self.key_data = None
+    
+    def make_room(self, size):
+        """Libera espaco para size bytes e retorna onde escrever (None se nao couber)."""
+        if size > len(self.arena):
+            self.clear()
+            return None
+        start = self.write_pos
+        if start + size > len(self.arena):
+            # Volta ao inicio do anel: o que sobrou no fim e o mais antigo
+            while self.count and self.starts[self.first] >= start:
+                self.drop_oldest()
+            start = 0
+        while self.count and self.starts[self.first] < start + size and self.starts[self.first] + self.sizes[self.first] > start:
+            self.drop_oldest()
+        if self.count == self.slots:
+            self.drop_oldest()
+        return start
+    
+    def record(self, data):
+        """Guarda o snapshot deste tick."""
+        keyframe = self.key_data is None or len(data) != len(self.key_data) or self.since_key >= self.KEYFRAME_INTERVAL
+        if keyframe:
+            payload = data
+        else:
+            delta = int.from_bytes(data, "little") ^ int.from_bytes(self.key_data, "little")
+            payload = zlib.compress(delta.to_bytes(len(data), "little"), 1)
+        start = self.make_room(len(payload))
+        if start is None:
+            return
+        if not keyframe and self.key_data is None:
+            # O keyframe deste delta saiu para abrir espaco: gravar inteiro
+            keyframe = True
+            payload = data
+            start = self.make_room(len(payload))
+            if start is None:
+                return
+        size = len(payload)
+        slot = (self.first + self.count) % self.slots
+        if keyframe:
+            self.key_slot = slot
+            self.key_data = bytes(data)
+            self.since_key = 0
+        self.arena[start:start + size] = payload
+        self.starts[slot] = start
+        self.sizes[slot] = size
+        self.keys[slot] = self.key_slot
+        self.count += 1
+        self.since_key += 1
+        self.write_pos = start + size
+    
+    def read(self, slot):
+        """Bytes guardados num slot."""
+        start = self.starts[slot]
+        return bytes(self.arena[start:start + self.sizes[slot]])
+    
+    def pop(self):
+        """Remove e retorna o snapshot mais recente (None se nao houver)."""
+        if not self.count:
+            return None
+        self.count -= 1
+        slot = (self.first + self.count) % self.slots
+        key_slot = self.keys[slot]
+        payload = self.read(slot)
+        self.write_pos = self.starts[slot]
+        if key_slot == slot:
+            self.key_slot = -1
+            self.key_data = None
+            return payload
+        key_data = self.read(key_slot)
+        delta = int.from_bytes(zlib.decompress(payload), "little")
+        # Os proximos registros continuam a partir do mesmo keyframe
+        self.key_slot = key_slot
+        self.key_data = key_data
+        self.since_key = (slot - key_slot) % self.slots
+        return (delta ^ int.from_bytes(key_data, "little")).to_bytes(len(key_data), "little")
+
+
+class EventBus:
+    """Fila de eventos da partida, entregue em lote uma vez por frame.
+    
+    Os sistemas de jogo so fazem push; som, efeitos, estatisticas e telemetria
+    recebem todos os eventos do frame em dispatch() e podem ser desligados um a
+    um (enabled = False), por exemplo nas simulacoes sem janela.
+    """
+    
+    def __init__(self):
+        self.events = []
+        self.consumers = []
+    
+    def push(self, kind, x=0.0, y=0.0, value=0):
+        """Enfileira um evento (ver GameEvent)."""
+        self.events.append((kind, x, y, value))
+    
+    def subscribe(self, consumer):
+        """Registra um consumidor e o retorna."""
+        self.consumers.append(consumer)
+        return consumer
+    
+    def dispatch(self):
+        """Entrega os eventos do frame aos consumidores ligados."""
+        events = self.events
+        if not events:
+            return
+        self.events = []
+        for consumer in self.consumers:
+            if consumer.enabled:
+                consumer.consume(events)
+
+
+class EventConsumer:
+    """Base dos consumidores do EventBus."""
+    
+    enabled = True
+    
+    def consume(self, events):
+        """Recebe a lista de eventos do frame, em ordem."""
+
+
+class SoundEvents(EventConsumer):
+    """Efeitos sonoros dos eventos."""
+    
+    SOUNDS = {
+        GameEvent.JUMP: ("jump",),
+        GameEvent.SLASH: ("slash_sound",),
+        GameEvent.HIT: ("hurt",),
+        GameEvent.DEATH: ("hurt",),
+        GameEvent.DAMAGE: ("hurt",),
+    }
+    
+    def __init__(self, sound_bank):
+        self.sound_bank = sound_bank
+    
+    def consume(self, events):
+        self.sound_bank.begin_frame()
+        for kind, _, _, _ in events:
+            for name in self.SOUNDS.get(kind, ()):
+                self.sound_bank.play(name)
+
+
+class EffectEvents(EventConsumer):
+    """Particulas e sprite de impacto dos eventos."""
+    
+    IMPACT_TIME = 0.15  # Segundos com o sprite de impacto na tela
+    
+    def __init__(self, game):
+        self.game = game
+        self.impact_timer = 0.0
+        self.impact_x = 0
+        self.impact_y = 0
+        self.impact_facing = True
+    
+    def update(self, dt):
+        """Conta o tempo do sprite de impacto."""
+        if self.impact_timer > 0:
+            self.impact_timer -= dt
+    
+    def consume(self, events):
+        particles = self.game.particles
+        for kind, x, y, value in events:
+            if kind == GameEvent.SLASH:
+                # Faiscas na direcao do golpe e sprite de impacto
+                particles.emit(PARTICLE_SPARK, x, y, 16, 6, 0 if value else 180, 120)
+                self.impact_timer = self.IMPACT_TIME
+                self.impact_x = x
+                self.impact_y = y
+                self.impact_facing = bool(value)
+            elif kind == GameEvent.DEATH:
+                # Explosao de ossos
+                particles.emit(PARTICLE_BONE, x, y, 24, 6, -90, 200)
+                particles.emit(PARTICLE_DUST, x, y + 10, 10, 2, -90, 180)
+            elif kind == GameEvent.HIT:
+                particles.emit(PARTICLE_BLOOD, x, y, value + 4, 4)
+            elif kind == GameEvent.LAND:
+                particles.emit(PARTICLE_DUST, x, y, 8, 2.5, -90, 160)
+
+
+class EventStats(EventConsumer):
+    """Contagem de eventos por tipo."""
+    
+    def __init__(self):
+        self.counts = {}
+    
+    def reset(self):
+        """Zera as contagens."""
+        self.counts = {}
+    
+    def consume(self, events):
+        counts = self.counts
+        for event in events:
+            counts[event[0]] = counts.get(event[0], 0) + 1
+
+
+class TelemetryLog(EventConsumer):
+    """Grava os eventos em JSON, uma linha por frame com eventos."""
+    
+    def __init__(self, path, game):
+        self.path = path
+        self.game = game
+        self.file = None
+    
+    def consume(self, events):
+        if self.file is None:
+            try:
+                self.file = open(self.path, "a", encoding="utf-8", buffering=1)
+            except OSError as e:
+                print(f"Telemetria desligada: {e}")
+                self.enabled = False
+                return
+        self.file.write(json.dumps({"t": round(self.game.scene_time, 3), "events": events}) + "\n")
+
+
+class VideoRecorder:
+    """Grava os frames da tela em uma thread separada.
+    
+    capture() so copia (e reduz) o frame e o coloca em uma fila limitada; a
+    thread de gravacao converte, comprime e escreve no disco. Se a gravacao
+    atrasar e a fila encher, o frame e descartado e contado em dropped, sem
+    nunca segurar o loop do jogo.
+    
+    Formato .etv: cabecalho (MAGIC, versao, largura, altura) e, por frame,
+    (numero do frame, tamanho) seguido dos pixels RGB comprimidos com zlib.
+    Frames descartados aparecem como buracos na numeracao. Caminhos
+    terminados em .png gravam uma sequencia nome_000001.png.
+    """
+    
+    MAGIC = b"ETGV"
+    VERSION = 1
+    HEADER = struct.Struct("<4sHHH")
+    FRAME = struct.Struct("<II")  # Numero do frame, bytes comprimidos
+    QUEUE_SIZE = 30  # Meio segundo de folga
+    
+    def __init__(self, path, scale=1.0):
+        self.path = path
+        self.scale = scale
+        self.png = path.lower().endswith(".png")
+        self.queue = queue.Queue(self.QUEUE_SIZE)
+        self.thread = None
+        self.closed = False
+        self.frames = 0  # Frames oferecidos (inclui descartados)
+        self.written = 0
+        self.dropped = 0
+        self.size = None
+    
+    def capture(self, surface):
+        """Enfileira uma copia do frame; descarta se a gravacao estiver atrasada."""
+        if self.closed:
+            return
+        index = self.frames
+        self.frames += 1
+        if self.thread is None:
+            width, height = surface.get_size()
+            self.size = (max(1, int(width * self.scale)), max(1, int(height * self.scale)))
+            self.thread = threading.Thread(target=self.run, name="video", daemon=True)
+            self.thread.start()
+            atexit.register(self.close)
+        if self.queue.full():
+            # Antes de copiar: um frame descartado nao custa nada
+            self.dropped += 1
+            return
+        if self.size == surface.get_size():
+            frame = surface.copy()
+        else:
+            frame = pygame.transform.scale(surface, self.size)
+        try:
+            self.queue.put_nowait((index, frame))
+        except queue.Full:
+            self.dropped += 1
+    
+    def run(self):
+        """Thread de gravacao: escreve os frames ate receber None."""
+        out = None
+        try:
+            if not self.png:
+                out = open(self.path, "wb")
+                out.write(self.HEADER.pack(self.MAGIC, self.VERSION, *self.size))
+            while True:
+                item = self.queue.get()
+                if item is None:
+                    break
+                index, frame = item
+                if self.png:
+                    pygame.image.save(frame, f"{self.path[:-4]}_{index:06d}.png")
+                else:
+                    data = zlib.compress(pygame.image.tobytes(frame, "RGB"), 1)
+                    out.write(self.FRAME.pack(index, len(data)))
+                    out.write(data)
+                self.written += 1
+        except (OSError, pygame.error) as e:
+            # A fila enche e capture() passa a descartar todos os frames
+            print(f"Gravacao de video interrompida: {e}")
+        finally:
+            if out is not None:
+                out.close()
+    
+    def close(self):
+        """Grava o que falta na fila e fecha o arquivo."""
+        if self.thread is None or self.closed:
+            return
+        self.closed = True
+        if self.thread.is_alive():
+            self.queue.put(None)
+            self.thread.join()
+        print(f"[video] {self.written} frames gravados, {self.dropped} descartados")
     
-    def draw(self, screen):
-        """Desenha o botao."""
-        color = (100, 150, 200) if self.hovered else (70, 120, 170)
-        border_color = (150, 200, 255) if self.hovered else (100, 150, 200)
-        
-        screen.draw.filled_rect(self.rect, color)
-        screen.draw.rect(self.rect, border_color)
-        
-        screen.draw.text(
-            self.text,
-            center=(self.x, self.y),
-            fontsize=24,
-            color="white",
-            shadow=(1, 1),
-            scolor="black"
-        )
+    @classmethod
+    def read(cls, path):
+        """Le um arquivo .etv: gera (numero do frame, (largura, altura), pixels RGB)."""
+        with open(path, "rb") as f:
+            magic, version, width, height = cls.HEADER.unpack(f.read(cls.HEADER.size))
+            if magic != cls.MAGIC or version != cls.VERSION:
+                raise ValueError("gravacao de outra versao")
+            while True:
+                header = f.read(cls.FRAME.size)
+                if len(header) < cls.FRAME.size:
+                    return
+                index, size = cls.FRAME.unpack(header)
+                yield index, (width, height), zlib.decompress(f.read(size))
 
 
 class Game:
     """Classe principal do jogo."""
     
-    def __init__(self):
-        self.state = GameState.MENU
-        self.sound_enabled = True
+    def __init__(self, headless=False):
+        # Construcao leve: nada de I/O aqui, os assets sao carregados em estagios
+        self.state = GameState.LOADING
+        self.headless = headless  # Sem janela, sem som e sem sprites (simulacoes)
+        self.sound_enabled = not headless
         self.music_playing = False
-        # Inicializar mixer do pygame para garantir que funcione
-        try:
-            if not pygame.mixer.get_init():
-                pygame.mixer.init(frequency=44100, size=-16, channels=2, buffer=512)
-        except:
-            pass
-        self.load_sprites()
-        self.reset_game()
-        self.create_menu_buttons()
+        self.sound_bank = SoundBank()
+        self.animation_sets = None  # AnimationSet por personagem (CHAR_*)
+        self.impact_frames = None  # Entradas (surface, meia largura, meia altura) esquerda/direita
+        self.backgrounds = None  # Camadas de parallax por estado (criadas no carregamento)
+        self.hud = None  # Criado no primeiro desenho
+        self.boss_bar = None  # Barra de vida do boss atual
+        self.render_scale = RENDER_SCALE  # Resolucao interna do mundo (1 = tela inteira)
+        self.view = None  # ViewScreen da resolucao interna atual
+        # Qualidade visual (ver QualityGovernor), ajustada pelo tempo de frame
+        self.governor = None
+        if not headless:
+            fixed = QUALITY.isdigit()
+            top = len(QUALITY_LEVELS) - 1
+            level = min(int(QUALITY), top) if fixed else 0
+            if fixed and int(QUALITY) > top:
+                print(f"ELDEN_QUALITY fora da faixa: {QUALITY!r} (use auto ou 0 a {top}); usando {top}")
+            elif not fixed and QUALITY != "auto":
+                print(f"ELDEN_QUALITY desconhecido: {QUALITY!r} (use auto ou 0 a {top}); ajustando sozinho")
+            self.governor = QualityGovernor(level, adaptive=not fixed)
+        self.draw_clouds = True
+        self.portal_detail = True
+        self.particle_fraction = 1.0
+        self.frame_start = None  # Inicio do trabalho do frame atual (update)
+        # Pausa (tecla P ou janela sem foco) e redesenho sob demanda nas telas paradas
+        self.paused = False
+        self.auto_paused = False  # Pausado pela perda de foco: volta sozinho
+        self.focused = None  # Ultimo estado de foco visto (None = ainda nao visto)
+        self.needs_redraw = True
+        self.drawn_state = None
+        self.scene_time = 0.0  # Segundos de jogo, para as camadas que andam sozinhas
         # Sistema de ondas de inimigos (estilo Castlevania)
         self.current_wave = 0
         self.total_waves = 3  # 3 inimigos no total
         self.enemy_spawn_timer = 0
         self.enemy_spawn_delay = 1.0  # Delay entre spawns
+        self.controller = None  # Controlador do jogador (None = teclado do PgZero)
+        # Eventos da partida e seus consumidores (som e efeitos desligados sem janela)
+        self.events = EventBus()
+        self.sound_events = self.events.subscribe(SoundEvents(self.sound_bank))
+        self.sound_events.enabled = self.sound_enabled
+        self.effects = self.events.subscribe(EffectEvents(self))
+        self.effects.enabled = not headless
+        self.stats = self.events.subscribe(EventStats())
+        if TELEMETRY_PATH:
+            self.events.subscribe(TelemetryLog(TELEMETRY_PATH, self))
+        self.recorder = VideoRecorder(RECORD_PATH, RECORD_SCALE) if RECORD_PATH and not headless else None
+        self.reset_game()
+        self.create_menu_buttons()
+        # Estagios de carregamento, um por frame (a tela de splash aparece antes)
+        self.loading_stages = [
+            ("Iniciando audio", self.init_mixer),
+            ("Carregando sons", self.sound_bank.load),
+            ("Carregando sprites", self.load_sprites),
+            ("Carregando bosses", load_boss_script),
+            ("Desenhando cenarios", self.build_backgrounds),
+        ]
+        self.resume_path = "" if headless else RESUME_PATH
+        self.resume_timer = 0.0
+        # Ultimos segundos da partida para voltar no tempo (so com janela)
+        self.rewind = None if headless else RewindBuffer()
+        self.rewinding = False
+        self.loading_index = 0
+        self.stage_times = []
+        self.first_frame_time = None
+        if headless:
+            self.loading_stages = []
+            self.state = GameState.MENU
+        else:
+            self.apply_quality()
+    
+    def init_mixer(self):
+        """Inicializa o mixer do pygame para garantir que funcione."""
+        try:
+            if not pygame.mixer.get_init():
+                pygame.mixer.init(frequency=44100, size=-16, channels=2, buffer=512)
+        except:
+            pass
+    
+    def load_next_stage(self):
+        """Executa o proximo estagio de carregamento."""
+        name, stage = self.loading_stages[self.loading_index]
+        start = time.perf_counter()
+        stage()
+        self.stage_times.append((name, time.perf_counter() - start))
+        self.loading_index += 1
+        if self.loading_index >= len(self.loading_stages):
+            self.state = GameState.MENU
+            if self.resume_path:
+                self.load_resume()
+            if STARTUP_PROFILE:
+                self.report_startup()
+    
+    def finish_loading(self):
+        """Executa todos os estagios restantes de uma vez."""
+        while self.state == GameState.LOADING:
+            self.load_next_stage()
+    
+    def frame_drawn(self):
+        """Registra o frame desenhado (primeiro frame e tempo de trabalho)."""
+        if self.first_frame_time is None:
+            self.first_frame_time = time.perf_counter() - STARTUP_T0
+            if STARTUP_PROFILE:
+                print(f"[startup] primeiro frame: {self.first_frame_time * 1000:.1f} ms")
+        # So a partida conta: menus sao leves e distorceriam a media
+        if self.governor is not None and self.frame_start is not None and not self.paused and self.state in (GameState.PLAYING, GameState.BOSS_ROOM):
+            if self.governor.record(time.perf_counter() - self.frame_start):
+                self.apply_quality()
+                print(f"[qualidade] nivel {self.governor.level} (media anterior {self.governor.average * 1000:.1f} ms)")
+        self.frame_start = None
+    
+    def apply_quality(self):
+        """Aplica o nivel de qualidade atual do governador."""
+        clouds, portal_detail, particles, scale = QUALITY_LEVELS[self.governor.level]
+        self.draw_clouds = clouds
+        self.portal_detail = portal_detail
+        self.particle_fraction = particles
+        self.particles.limit = int(self.particles.budget * particles)
+        self.render_scale = min(RENDER_SCALE, scale)
+    
+    def report_startup(self):
+        """Imprime os tempos de inicializacao."""
+        for name, seconds in self.stage_times:
+            print(f"[startup] {name}: {seconds * 1000:.1f} ms")
+        print(f"[startup] menu pronto: {(time.perf_counter() - STARTUP_T0) * 1000:.1f} ms")
     
     def load_sprites(self):
         """Pre-carrega todos os sprites do jogo."""
         try:
-            # Funcao auxiliar para redimensionar sprites
-            def scale_sprite(img):
-                new_width = int(img.get_width() * SPRITE_SCALE)
-                new_height = int(img.get_height() * SPRITE_SCALE)
-                return pygame.transform.scale(img, (new_width, new_height))
-            
-            # Carregar sprites do jogador (direita e esquerda) - apenas attack_02
-            idle_r = scale_sprite(pygame.image.load(resource_path("images/hero_paused.png")).convert_alpha())
-            walk0_r = scale_sprite(pygame.image.load(resource_path("images/hero_walk_01.png")).convert_alpha())
-            walk1_r = scale_sprite(pygame.image.load(resource_path("images/hero_walk_02.png")).convert_alpha())
-            attack1_r = scale_sprite(pygame.image.load(resource_path("images/hero_attack_02.png")).convert_alpha())
-
-            self.player_sprites = {
-                'idle_r': idle_r,
-                'idle_l': pygame.transform.flip(idle_r, True, False),
-                'walk_0_r': walk0_r,
-                'walk_0_l': pygame.transform.flip(walk0_r, True, False),
-                'walk_1_r': walk1_r,
-                'walk_1_l': pygame.transform.flip(walk1_r, True, False),
-                'attack_0_r': attack1_r,
-                'attack_0_l': pygame.transform.flip(attack1_r, True, False),
-            }
-            
-            # Carregar sprites dos inimigos (direita e esquerda)
-            enemy_walk0_r = scale_sprite(pygame.image.load(resource_path("images/enemy_walk_01.png")).convert_alpha())
-            enemy_walk1_r = scale_sprite(pygame.image.load(resource_path("images/enemy_walk_02.png")).convert_alpha())
-
-            self.enemy_sprites = {
-                'walk_0_r': enemy_walk0_r,
-                'walk_0_l': pygame.transform.flip(enemy_walk0_r, True, False),
-                'walk_1_r': enemy_walk1_r,
-                'walk_1_l': pygame.transform.flip(enemy_walk1_r, True, False),
-            }
+            # Sprites escalados e espelhados vem do cache em disco quando possivel
+            cache = SpriteCache()
+            frames = {}
+            for states in ANIMATIONS.values():
+                for names, _ in states.values():
+                    for name in names:
+                        if name not in frames:
+                            frames[name] = cache.load_pair(resource_path(f"images/{name}.png"))
+            self.animation_sets = [AnimationSet(ANIMATIONS[kind], frames) for kind in sorted(ANIMATIONS)]
             
-            # Sprites do boss (usando sprites de inimigo, tamanho 1x1 = mesmo tamanho)
+            # Sprite de impacto do ataque, limitado a IMPACT_MAX_SIZE
             try:
-                enemy_attack_r = scale_sprite(pygame.image.load("images/enemy_attack_01.png").convert_alpha())
-                self.boss_sprites = {
-                    'walk_0_r': enemy_walk0_r,
-                    'walk_0_l': pygame.transform.flip(enemy_walk0_r, True, False),
-                    'walk_1_r': enemy_walk1_r,
-                    'walk_1_l': pygame.transform.flip(enemy_walk1_r, True, False),
-                    'attack_0_r': enemy_attack_r,
-                    'attack_0_l': pygame.transform.flip(enemy_attack_r, True, False),
-                }
-            except:
-                # Se nao tiver sprite de ataque, usar apenas os de caminhada
-                self.boss_sprites = {
-                    'walk_0_r': enemy_walk0_r,
-                    'walk_0_l': pygame.transform.flip(enemy_walk0_r, True, False),
-                    'walk_1_r': enemy_walk1_r,
-                    'walk_1_l': pygame.transform.flip(enemy_walk1_r, True, False),
-                }
+                impact = []
+                for surface in cache.load_pair(resource_path("images/hero_attack_impact.png")):
+                    if surface.get_width() > IMPACT_MAX_SIZE or surface.get_height() > IMPACT_MAX_SIZE:
+                        scale_factor = min(IMPACT_MAX_SIZE / surface.get_width(), IMPACT_MAX_SIZE / surface.get_height())
+                        new_size = (int(surface.get_width() * scale_factor), int(surface.get_height() * scale_factor))
+                        surface = pygame.transform.scale(surface, new_size)
+                    impact.append((surface, surface.get_width() // 2, surface.get_height() // 2))
+                self.impact_frames = (impact[1], impact[0])
+            except Exception as e:
+                print(f"Erro ao carregar sprite de impacto: {e}")
         except Exception as e:
             print(f"Erro ao carregar sprites: {e}")
-            self.player_sprites = None
-            self.enemy_sprites = None
-            self.boss_sprites = None
+            self.animation_sets = None
         
+    def build_backgrounds(self):
+        """Pre-renderiza as camadas de fundo."""
+        self.backgrounds = build_backgrounds()
+    
     def create_menu_buttons(self):
         """Cria os botoes do menu."""
         self.btn_play = Button(WIDTH // 2, 250, "JOGAR")
@@ -588,12 +3044,22 @@ class Game:
         
     def reset_game(self):
         """Reinicia o jogo para o estado inicial."""
-        self.player = Player(100, GROUND_Y)
+        self.world = World()
+        self.projectiles = ProjectilePool()
+        self.world.projectiles = self.projectiles
+        self.world.events = self.events
+        # Efeitos visuais; sem orcamento nas simulacoes sem janela
+        self.particles = ParticleSystem(0 if self.headless else PARTICLE_BUDGET)
+        self.particles.limit = int(self.particles.budget * self.particle_fraction)
+        self.player = Player(100, GROUND_Y, self.world)
         self.player.collectibles_collected = 0
+        self.stats.reset()
         self.enemies = []
-        self.platforms = []  # Sem plataformas - estilo Castlevania
+        self.set_platforms([])  # Sem plataformas - estilo Castlevania
         self.collectibles = []  # Sem coletaveis
         self.boss = None
+        self.boss_bar = None
+        self.reinforcements_called = False
         self.exit_locked = True
         self.current_wave = 0
         self.enemy_spawn_timer = 0
@@ -602,7 +3068,7 @@ class Game:
     def create_level(self):
         """Cria o nivel estilo Castlevania - corredor horizontal sem plataformas."""
         # Sem plataformas - estilo Castlevania
-        self.platforms = []
+        self.set_platforms([])
         self.collectibles = []
         
         # Inimigos serao spawnados sequencialmente (sistema de ondas)
@@ -613,15 +3079,46 @@ class Game:
         # Porta do boss trancada ate matar todos os inimigos
         self.exit_locked = True
     
+    def set_platforms(self, platforms):
+        """Troca as plataformas do nivel e reconstroi a grade espacial e o grafo de navegacao."""
+        self.platforms = platforms
+        self.platform_grid = PlatformGrid(platforms)
+        self.world.set_nav(NavGraph(self.platform_grid))
+    
     def update(self, dt, keyboard):
         """Atualiza o estado do jogo."""
-        if self.state == GameState.PLAYING:
-            sound_to_play = self.player.update(dt, self.platforms, keyboard)
-            if sound_to_play == "jump" and self.sound_enabled:
-                try:
-                    sounds.jump.play()
-                except:
-                    pass
+        if self.controller is not None:
+            if self.state in (GameState.PLAYING, GameState.BOSS_ROOM):
+                keyboard = self.controller.poll(self, dt)
+            elif self.state in (GameState.MENU, GameState.GAME_OVER, GameState.VICTORY) and self.controller.autoplay:
+                self.start_game()
+                return
+        
+        playing = self.state in (GameState.PLAYING, GameState.BOSS_ROOM)
+        if playing and self.paused:
+            return
+        was_rewinding = self.rewinding
+        self.rewinding = playing and self.rewind is not None and keyboard.r
+        if self.rewinding:
+            # Segurando R: um tick para tras por frame, sem simular
+            if not was_rewinding:
+                self.rewind.pop()  # O ultimo gravado e o tick que esta na tela
+            data = self.rewind.pop()
+            if data is not None:
+                Snapshot.restore(self, data)
+            self.effects.update(dt)
+            self.events.dispatch()
+            return
+        
+        if self.state == GameState.LOADING:
+            # So carregar depois que o splash ja apareceu na tela
+            if self.first_frame_time is not None:
+                self.load_next_stage()
+        
+        elif self.state == GameState.PLAYING:
+            self.scene_time += dt
+            sound_to_play = self.player.update(dt, self.platform_grid, keyboard)
+            self.push_player_events(sound_to_play)
             
             # Sistema de ondas de inimigos (estilo Castlevania)
             # Spawnar primeiro inimigo se nao houver nenhum
@@ -631,7 +3128,7 @@ class Game:
                 spawn_y = GROUND_Y  # No chao
                 patrol_left = spawn_x - 150
                 patrol_right = min(WIDTH - 100, spawn_x + 150)
-                self.enemies.append(Enemy(spawn_x, spawn_y, patrol_left, patrol_right))
+                self.enemies.append(Enemy(spawn_x, spawn_y, patrol_left, patrol_right, self.world))
                 self.current_wave = 1
                 self.enemy_spawn_timer = 0
             
@@ -646,61 +3143,27 @@ class Game:
                     spawn_y = GROUND_Y  # No chao
                     patrol_left = spawn_x - 150
                     patrol_right = min(WIDTH - 100, spawn_x + 150)
-                    self.enemies.append(Enemy(spawn_x, spawn_y, patrol_left, patrol_right))
+                    self.enemies.append(Enemy(spawn_x, spawn_y, patrol_left, patrol_right, self.world))
                     self.current_wave += 1
                     self.enemy_spawn_timer = 0
             
             # Desbloquear saida quando todos os inimigos forem mortos
-            if len([e for e in self.enemies if e.alive]) == 0 and self.current_wave >= self.total_waves:
+            if self.exit_locked and len([e for e in self.enemies if e.alive]) == 0 and self.current_wave >= self.total_waves:
                 self.exit_locked = False
+                self.events.push(GameEvent.WAVE_CLEARED, value=self.total_waves)
             
             # Verificar ataque do jogador (apenas uma vez por ataque)
-            if self.player.is_attacking and not self.player.attack_hit_this_frame:
-                attack_rect = self.player.get_attack_rect()
-                hit_something = False
-                for enemy in self.enemies[:]:  # Copia da lista para permitir remocao
-                    if enemy.alive and enemy.get_rect().colliderect(attack_rect):
-                        enemy.alive = False
-                        # Efeito visual de hit (sera desenhado no proximo frame)
-                        enemy.hit_effect = True
-                        hit_something = True
-                        # Mostrar sprite de impacto na posicao do hit
-                        self.player.show_impact = True
-                        self.player.impact_timer = 0
-                        self.player.impact_x = enemy.x
-                        self.player.impact_y = enemy.y
-                        # Tocar som de slash quando acerta (sempre tocar, sem flag)
-                        if self.sound_enabled:
-                            try:
-                                sounds.slash_sound.play()
-                            except:
-                                pass
-                        if self.sound_enabled:
-                            try:
-                                sounds.hurt.play()
-                            except:
-                                pass
-                if hit_something:
-                    self.player.attack_hit_this_frame = True
+            self.attack_enemies()
             
-            # Atualizar e verificar colisao com inimigos vivos
-            for enemy in self.enemies:
-                if enemy.alive:
-                    enemy.update(dt)
-                    
-                    if enemy.check_collision_with_player(self.player):
-                        if self.player.take_damage():
-                            if self.sound_enabled:
-                                try:
-                                    sounds.hurt.play()
-                                except:
-                                    pass
+            # Sistemas do World (patrulha, limites, efeitos, animacao)
+            self.world.run(dt, self.player)
+            self.update_projectiles(dt)
+            self.particles.update(dt)
             
-            # Remover inimigos mortos
-            self.enemies = [e for e in self.enemies if e.alive]
+            self.touch_enemies()
             
             if self.player.lives <= 0:
-                self.state = GameState.GAME_OVER
+                self.end_game(GameState.GAME_OVER)
             
             # Verificar entrada na porta do boss (nao trancada)
             exit_x = WIDTH - 50  # Centro da porta
@@ -710,16 +3173,18 @@ class Game:
                 self.enter_boss_room()
         
         elif self.state == GameState.BOSS_ROOM:
-            sound_to_play = self.player.update(dt, self.platforms, keyboard)
-            if sound_to_play == "jump" and self.sound_enabled:
-                try:
-                    sounds.jump.play()
-                except:
-                    pass
+            self.scene_time += dt
+            sound_to_play = self.player.update(dt, self.platform_grid, keyboard)
+            self.push_player_events(sound_to_play)
+            
+            # Ataque nos cacadores chamados pelo boss (apenas uma vez por ataque)
+            self.attack_enemies()
+            
+            # Sistemas do World (perseguicao do boss e dos cacadores, limites, efeitos, animacao)
+            self.world.run(dt, self.player)
             
-            # Atualizar boss
-            if self.boss and self.boss.alive:
-                self.boss.update(dt, self.player)
+            self.update_projectiles(dt)
+            self.particles.update(dt)
             
             # Verificar ataque do jogador no boss (apenas uma vez por ataque)
             if self.player.is_attacking and not self.player.attack_hit_this_frame and self.boss and self.boss.alive:
@@ -730,43 +3195,150 @@ class Game:
                     self.boss.hit_effect = True
                     self.boss.hit_effect_timer = 0
                     self.player.attack_hit_this_frame = True  # Marcar que ja acertou neste ataque
-                    # Mostrar sprite de impacto na posicao do hit
-                    self.player.show_impact = True
-                    self.player.impact_timer = 0
-                    self.player.impact_x = self.boss.x
-                    self.player.impact_y = self.boss.y
-                    # Tocar som de slash quando acerta (sempre tocar, sem flag)
-                    if self.sound_enabled:
-                        try:
-                            sounds.slash_sound.play()
-                        except:
-                            pass
-                    if self.sound_enabled:
-                        try:
-                            sounds.hurt.play()
-                        except:
-                            pass
+                    self.events.push(GameEvent.SLASH, self.boss.x, self.boss.y, self.player.facing_right)
+                    self.events.push(GameEvent.HIT, self.boss.x, self.boss.y, 10)
             
             # Verificar colisao com boss
             if self.boss and self.boss.alive and self.boss.get_rect().colliderect(self.player.get_rect()):
-                if self.player.take_damage():
-                    if self.sound_enabled:
-                        try:
-                            sounds.hurt.play()
-                        except:
-                            pass
+                self.damage_player()
+            
+            # Na metade da vida o boss chama cacadores nas plataformas altas
+            if (not self.reinforcements_called and self.boss and self.boss.alive
+                    and self.boss.health <= self.boss.max_health * BOSS_REINFORCEMENT_HEALTH):
+                self.call_reinforcements()
+            
+            self.touch_enemies()
+            
+            self.boss_bar.update(dt, self.boss.health)
             
             if self.player.lives <= 0:
-                self.state = GameState.GAME_OVER
+                self.end_game(GameState.GAME_OVER)
             
             # Vitoria se boss morrer
             if self.boss and not self.boss.alive:
-                self.state = GameState.VICTORY
+                self.end_game(GameState.VICTORY)
+        
+        if self.rewind is not None and self.state in (GameState.PLAYING, GameState.BOSS_ROOM):
+            # Tiros ficam de fora: voltar no tempo limpa a tela de projeteis
+            self.rewind.record(Snapshot.pack(self, include_projectiles=False))
+        
+        # Salvamento periodico para a retomada rapida
+        if self.resume_path and self.state in (GameState.PLAYING, GameState.BOSS_ROOM):
+            self.resume_timer += dt
+            if self.resume_timer >= RESUME_INTERVAL:
+                self.resume_timer = 0.0
+                self.save_resume()
+        
+        # Som, efeitos, estatisticas e telemetria do frame, em lote
+        self.effects.update(dt)
+        self.events.dispatch()
+    
+    def attack_enemies(self):
+        """Aplica o golpe de espada do jogador nos inimigos que ele alcanca."""
+        if not self.player.is_attacking or self.player.attack_hit_this_frame:
+            return
+        attack_rect = self.player.get_attack_rect()
+        hit_something = False
+        hit_ids = set(self.world.overlapping("enemy", attack_rect))
+        for enemy in self.enemies:
+            if enemy.eid in hit_ids:
+                enemy.alive = False
+                # Efeito visual de hit (sera desenhado no proximo frame)
+                enemy.hit_effect = True
+                hit_something = True
+                self.events.push(GameEvent.SLASH, enemy.x, enemy.y, self.player.facing_right)
+                self.events.push(GameEvent.DEATH, enemy.x, enemy.y, enemy.eid)
+        if hit_something:
+            self.player.attack_hit_this_frame = True
+    
+    def touch_enemies(self):
+        """Dano por contato com os inimigos vivos e remocao dos mortos."""
+        # So os que estao perto o bastante para rodar em taxa cheia podem encostar
+        for eid in self.world.overlapping("enemy", self.player.get_rect(), self.world.near):
+            self.damage_player()
+        
+        # Remover inimigos mortos
+        for enemy in self.enemies:
+            if not enemy.alive:
+                enemy.destroy()
+        self.enemies = [e for e in self.enemies if e.alive]
+    
+    def call_reinforcements(self):
+        """Cacadores caem nas plataformas mais altas, as mais longe do jogador primeiro."""
+        self.reinforcements_called = True
+        platforms = sorted(self.platforms[1:], key=lambda p: (p.y, -abs(p.x + p.width / 2 - self.player.x)))
+        for platform in platforms[:BOSS_REINFORCEMENTS]:
+            # Pes logo acima do topo, para pousar na propria plataforma
+            self.enemies.append(Hunter(platform.x + platform.width / 2, platform.y - 60 * SPRITE_SCALE // 2, self.world))
+    
+    def update_projectiles(self, dt):
+        """Move os projeteis e aplica os acertos."""
+        player_hit, hits = self.projectiles.update(dt, self.player.get_rect(), self.world, self.platform_grid)
+        if player_hit:
+            self.damage_player()
+        for eid, count in hits.items():
+            x, y = self.world.x[eid], self.world.y[eid]
+            if self.boss is not None and eid == self.boss.eid:
+                self.boss.take_damage(PLAYER_SHOT_DAMAGE * count)
+                self.boss.hit_effect = True
+                self.boss.hit_effect_timer = 0
+                self.events.push(GameEvent.HIT, x, y, PLAYER_SHOT_DAMAGE * count)
+            else:
+                # Inimigos comuns morrem com um tiro (removidos no fim do update)
+                self.world.alive[eid] = False
+                self.world.hit_active[eid] = True
+                self.events.push(GameEvent.DEATH, x, y, eid)
+    
+    def damage_player(self):
+        """Aplica dano ao jogador (respeitando a invencibilidade)."""
+        if self.player.take_damage():
+            self.events.push(GameEvent.DAMAGE, self.player.x, self.player.y)
+    
+    def push_player_events(self, sound_to_play):
+        """Eventos de pulo e de pouso do jogador neste tick."""
+        if sound_to_play == "jump":
+            self.events.push(GameEvent.JUMP, self.player.x, self.player.y)
+        if self.player.landed:
+            self.events.push(GameEvent.LAND, self.player.x, self.player.y + 60 * SPRITE_SCALE // 2)
+    
+    def player_shoot(self):
+        """Dispara o tiro do jogador, se a recarga permitir."""
+        if self.player.shoot():
+            direction = 1 if self.player.facing_right else -1
+            self.projectiles.spawn(
+                self.player.x + direction * 10, self.player.y,
+                direction * PLAYER_SHOT_SPEED, 0,
+                self.player.eid, TEAM_PLAYER
+            )
+            self.events.push(GameEvent.SHOT, self.player.x, self.player.y)
     
     def enter_boss_room(self):
         """Entra na sala do boss."""
         self.state = GameState.BOSS_ROOM
+        self.projectiles.clear()
+        self.particles.clear()
         # Parar musica atual e tocar musica do boss
+        self.start_boss_music()
+        # Criar boss no centro da tela - posicao inicial corrigida
+        sprite_height = 60 * SPRITE_SCALE
+        sprite_width = 40 * SPRITE_SCALE
+        # Posicionar boss no centro, pes no chao (GROUND_Y e onde os pes devem estar)
+        self.boss = Boss(WIDTH // 2, GROUND_Y, self.world)
+        self.boss_bar = BossHealthBar(self.boss)
+        # Resetar velocidade do boss para evitar pulo inicial
+        self.boss.velocity_x = 1.5  # Inicializar com velocidade normal
+        self.boss.facing_right = False  # Comecar virado para o jogador
+        # Resetar posicao do jogador - lado esquerdo
+        self.player.x = sprite_width // 2 + 80
+        self.player.y = GROUND_Y
+        # Resetar velocidade do jogador
+        self.player.velocity_x = 0
+        self.player.velocity_y = 0
+        # Plataformas melhoradas para a boss room - mais baixas
+        self.set_platforms(boss_room_platforms())
+    
+    def start_boss_music(self):
+        """Troca a musica de fundo pelo tema do boss."""
         self.stop_music()
         if self.sound_enabled:
             try:
@@ -794,37 +3366,16 @@ class Game:
                 print(f"Erro ao tocar musica do boss: {e}")
                 import traceback
                 traceback.print_exc()
-        # Criar boss no centro da tela - posicao inicial corrigida
-        sprite_height = 60 * SPRITE_SCALE
-        sprite_width = 40 * SPRITE_SCALE
-        # Posicionar boss no centro, pes no chao (GROUND_Y e onde os pes devem estar)
-        self.boss = Boss(WIDTH // 2, GROUND_Y)
-        # Resetar velocidade do boss para evitar pulo inicial
-        self.boss.velocity_x = 1.5  # Inicializar com velocidade normal
-        self.boss.facing_right = False  # Comecar virado para o jogador
-        # Resetar posicao do jogador - lado esquerdo
-        self.player.x = sprite_width // 2 + 80
-        self.player.y = GROUND_Y
-        # Resetar velocidade do jogador
-        self.player.velocity_x = 0
-        self.player.velocity_y = 0
-        # Plataformas melhoradas para a boss room - mais baixas
-        self.platforms = [
-            Platform(0, GROUND_Y, WIDTH, 20),  # Chao principal
-            Platform(100, GROUND_Y - 120, 180, 20),  # Plataforma esquerda (mais baixa)
-            Platform(520, GROUND_Y - 120, 180, 20),  # Plataforma direita (mais baixa)
-            Platform(200, GROUND_Y - 220, 140, 20),  # Plataforma superior esquerda
-            Platform(460, GROUND_Y - 220, 140, 20),  # Plataforma superior direita
-            Platform(310, GROUND_Y - 320, 180, 20),  # Plataforma central superior
-        ]
     
     def handle_click(self, pos):
         """Processa cliques do mouse."""
+        self.needs_redraw = True
         if self.state == GameState.MENU:
             if self.btn_play.is_clicked(pos):
                 self.state = GameState.INSTRUCTIONS
             elif self.btn_sound.is_clicked(pos):
                 self.sound_enabled = not self.sound_enabled
+                self.sound_events.enabled = self.sound_enabled
                 self.btn_sound.text = "SOM: " + ("LIGADO" if self.sound_enabled else "DESLIGADO")
                 if not self.sound_enabled:
                     self.stop_music()
@@ -835,16 +3386,73 @@ class Game:
         
         elif self.state == GameState.INSTRUCTIONS:
             # Qualquer clique na tela de instrucoes inicia o jogo
-            self.state = GameState.PLAYING
-            self.reset_game()
-            self.start_music()
+            self.start_game()
         
         elif self.state in (GameState.GAME_OVER, GameState.VICTORY):
             self.state = GameState.MENU
             self.stop_music()
     
+    def start_game(self):
+        """Comeca uma nova partida."""
+        self.state = GameState.PLAYING
+        self.reset_game()
+        self.set_paused(False)
+        if self.rewind is not None:
+            self.rewind.clear()
+        self.start_music()
+    
+    def end_game(self, state):
+        """Termina a partida com GAME_OVER ou VICTORY."""
+        self.state = state
+        if self.resume_path:
+            # Partida terminada nao e retomada
+            try:
+                os.remove(self.resume_path)
+            except OSError:
+                pass
+        if self.controller is not None:
+            self.controller.on_game_end(self)
+    
+    def snapshot(self):
+        """Estado da partida em bytes (ver Snapshot)."""
+        return Snapshot.pack(self)
+    
+    def restore_snapshot(self, data):
+        """Volta ao estado de um snapshot()."""
+        Snapshot.restore(self, data)
+    
+    def save_resume(self):
+        """Grava o snapshot da retomada rapida (troca atomica do arquivo)."""
+        temp_path = self.resume_path + ".tmp"
+        try:
+            with open(temp_path, "wb") as f:
+                f.write(self.snapshot())
+            os.replace(temp_path, self.resume_path)
+        except OSError as e:
+            print(f"Retomada rapida desligada: {e}")
+            self.resume_path = ""
+    
+    def load_resume(self):
+        """Retoma a partida salva, se houver uma valida."""
+        try:
+            with open(self.resume_path, "rb") as f:
+                data = f.read()
+        except OSError:
+            return
+        try:
+            self.restore_snapshot(data)
+        except ValueError as e:
+            print(f"Ignorando partida salva: {e}")
+            self.state = GameState.MENU
+            return
+        if self.state == GameState.BOSS_ROOM:
+            self.start_boss_music()
+        elif self.state == GameState.PLAYING:
+            self.start_music()
+    
     def handle_mouse_move(self, pos):
         """Processa movimento do mouse para hover."""
+        self.needs_redraw = True
         if self.state == GameState.MENU:
             self.btn_play.update_hover(pos)
             self.btn_sound.update_hover(pos)
@@ -861,6 +3469,52 @@ class Game:
                 print(f"Erro ao tocar musica: {e}")
                 pass
     
+    def set_paused(self, paused, auto=False):
+        """Pausa ou continua a partida (auto: pausa pela perda de foco)."""
+        if paused == self.paused:
+            return
+        self.paused = paused
+        self.auto_paused = paused and auto
+        self.needs_redraw = True
+        try:
+            if paused:
+                pygame.mixer.music.pause()
+            else:
+                pygame.mixer.music.unpause()
+        except pygame.error:
+            pass
+    
+    def poll_focus(self):
+        """Pausa a partida quando a janela perde o foco ou e minimizada."""
+        focused = pygame.key.get_focused() and pygame.display.get_active()
+        if focused == self.focused:
+            return
+        # So transicoes contam: janelas que nunca tem foco (driver dummy) nao pausam
+        if self.focused is not None:
+            if not focused and self.state in (GameState.PLAYING, GameState.BOSS_ROOM):
+                self.set_paused(True, auto=True)
+            elif focused and self.auto_paused:
+                self.set_paused(False)
+        self.focused = focused
+        self.needs_redraw = True
+    
+    def idle_timeout(self):
+        """Segundos que o loop pode esperar por entrada (0 = rodar a toda)."""
+        if self.state in (GameState.MENU, GameState.INSTRUCTIONS, GameState.GAME_OVER, GameState.VICTORY):
+            if self.controller is None or not self.controller.autoplay:
+                return IDLE_WAIT
+        elif self.paused and self.state in (GameState.PLAYING, GameState.BOSS_ROOM):
+            return PAUSED_WAIT
+        return 0
+    
+    def should_draw(self):
+        """Telas paradas so sao redesenhadas quando algo mudou."""
+        if not self.idle_timeout() or self.needs_redraw or self.state != self.drawn_state:
+            self.needs_redraw = False
+            self.drawn_state = self.state
+            return True
+        return False
+    
     def stop_music(self):
         """Para a musica de fundo."""
         try:
@@ -875,20 +3529,87 @@ class Game:
     
     def draw(self, screen):
         """Desenha o jogo na tela."""
-        screen.fill((40, 44, 52))
-        
-        if self.state == GameState.MENU:
+        # O mundo pode ser desenhado em resolucao interna menor e ampliado; o
+        # HUD e os menus sempre saem na resolucao da tela
+        in_game = self.state in (GameState.PLAYING, GameState.BOSS_ROOM)
+        world_screen = self.view_screen() if in_game and self.render_scale < 1 else screen
+        world_screen.fill((40, 44, 52))
+        
+        if self.state == GameState.LOADING:
+            self.draw_loading(screen)
+        elif self.state == GameState.MENU:
             self.draw_menu(screen)
         elif self.state == GameState.INSTRUCTIONS:
             self.draw_instructions(screen)
         elif self.state == GameState.PLAYING:
-            self.draw_game(screen)
+            self.draw_game(world_screen)
         elif self.state == GameState.BOSS_ROOM:
-            self.draw_boss_room(screen)
+            self.draw_boss_room(world_screen)
         elif self.state == GameState.GAME_OVER:
             self.draw_game_over(screen)
         elif self.state == GameState.VICTORY:
             self.draw_victory(screen)
+        if in_game:
+            if world_screen is not screen:
+                world_screen.present(screen.surface)
+            self.draw_hud(screen)
+        if in_game and self.paused:
+            screen.draw.text(
+                "PAUSADO",
+                center=(WIDTH // 2, HEIGHT // 2 - 20),
+                fontsize=48,
+                color=(255, 215, 0),
+                shadow=(2, 2),
+                scolor="black"
+            )
+            screen.draw.text(
+                "P: Continuar   ESC: Menu",
+                center=(WIDTH // 2, HEIGHT // 2 + 25),
+                fontsize=22,
+                color="white",
+                shadow=(1, 1),
+                scolor="black"
+            )
+        if self.rewinding:
+            screen.draw.text(
+                "<< VOLTANDO NO TEMPO",
+                midtop=(WIDTH // 2, 130),
+                fontsize=28,
+                color=(150, 200, 255),
+                shadow=(2, 2),
+                scolor="black"
+            )
+    
+    def view_screen(self):
+        """ViewScreen na resolucao interna atual (recriado se ela mudar)."""
+        if self.view is None or self.view.scale != self.render_scale:
+            self.view = ViewScreen(self.render_scale)
+        return self.view
+    
+    def draw_loading(self, screen):
+        """Desenha a tela de splash com a barra de progresso."""
+        screen.draw.text(
+            "Elden Thing",
+            center=(WIDTH // 2, HEIGHT // 2 - 40),
+            fontsize=48,
+            color=(255, 215, 0),
+            shadow=(2, 2),
+            scolor="black"
+        )
+        bar_width = 300
+        bar_x = (WIDTH - bar_width) // 2
+        bar_y = HEIGHT // 2 + 20
+        progress = self.loading_index / len(self.loading_stages)
+        screen.draw.filled_rect(Rect(bar_x, bar_y, bar_width, 12), (20, 22, 26))
+        screen.draw.filled_rect(Rect(bar_x, bar_y, int(bar_width * progress), 12), (255, 215, 0))
+        screen.draw.rect(Rect(bar_x, bar_y, bar_width, 12), (100, 150, 200))
+        if self.loading_index < len(self.loading_stages):
+            screen.draw.text(
+                self.loading_stages[self.loading_index][0] + "...",
+                center=(WIDTH // 2, bar_y + 35),
+                fontsize=20,
+                color=(200, 200, 200)
+            )
     
     def draw_menu(self, screen):
         """Desenha o menu principal."""
@@ -944,7 +3665,7 @@ class Game:
         )
         
         screen.draw.text(
-            "X: Atacar",
+            "X: Atacar   C: Atirar   R: Voltar no tempo",
             center=(WIDTH // 2, y_pos + spacing * 2),
             fontsize=24,
             color="white"
@@ -998,17 +3719,8 @@ class Game:
     
     def draw_game(self, screen):
         """Desenha o jogo durante a partida."""
-        # Desenhar background gradiente (ceu)
-        for y in range(HEIGHT):
-            # Gradiente do azul claro ao azul escuro
-            ratio = y / HEIGHT
-            r = int(135 + (40 - 135) * ratio)
-            g = int(206 + (44 - 206) * ratio)
-            b = int(250 + (52 - 250) * ratio)
-            screen.draw.line((0, y), (WIDTH, y), (r, g, b))
-        
-        # Desenhar nuvens decorativas
-        self.draw_clouds(screen)
+        # Fundo em camadas (ceu, montanhas, nuvens, morros)
+        self.draw_background(screen, GameState.PLAYING)
         
         # Desenhar chao com grama (ajustado para corresponder a colisao)
         screen.draw.filled_rect(Rect(0, GROUND_Y, WIDTH, HEIGHT - GROUND_Y), (60, 100, 60))
@@ -1017,7 +3729,12 @@ class Game:
         # Desenhar porta do boss (estilo Castlevania - no chao a direita)
         goal_y = GROUND_Y - 50  # Porta no chao (centro vertical)
         goal_rect = Rect(WIDTH - 80, goal_y - 50, 60, 100)
-        if self.exit_locked:
+        if not self.portal_detail:
+            # Qualidade reduzida: porta e portal sem gradiente nem bordas grossas
+            screen.draw.filled_rect(goal_rect, (100, 30, 30) if self.exit_locked else (75, 228, 150))
+            screen.draw.rect(goal_rect, (200, 50, 50) if self.exit_locked else (255, 215, 0))
+            screen.draw.filled_circle((WIDTH - 50, goal_y), 15, (150, 150, 150) if self.exit_locked else (100, 255, 150))
+        elif self.exit_locked:
             # Saida trancada (vermelha escura com brilho)
             screen.draw.filled_rect(goal_rect, (100, 30, 30))
             # Borda vermelha brilhante
@@ -1055,50 +3772,57 @@ class Game:
         
         # Desenhar inimigos vivos
         for enemy in self.enemies:
-            if enemy.alive:
-                # Efeito visual de hit (flash branco)
-                if enemy.hit_effect:
-                    screen.draw.filled_circle((int(enemy.x), int(enemy.y)), int(30 * SPRITE_SCALE), (255, 255, 255))
             self.draw_enemy(screen, enemy)
         
-        # Desenhar sprite de impacto se houver hit (escalado corretamente)
-        if self.player.show_impact and self.player_sprites:
-            try:
-                direction = 'r' if self.player.facing_right else 'l'
-                impact_key = f'attack_impact_{direction}'
-                if impact_key in self.player_sprites:
-                    img_surface = self.player_sprites[impact_key]
-                    # Garantir que o sprite esta escalado - se nao estiver, escalar agora
-                    max_size = 150  # Tamanho maximo para o sprite de impacto
-                    if img_surface.get_width() > max_size or img_surface.get_height() > max_size:
-                        scale_factor = min(max_size / img_surface.get_width(), max_size / img_surface.get_height())
-                        new_width = int(img_surface.get_width() * scale_factor)
-                        new_height = int(img_surface.get_height() * scale_factor)
-                        img_surface = pygame.transform.scale(img_surface, (new_width, new_height))
-                    # O sprite ja esta escalado em load_sprites, entao usar diretamente
-                    pos_x = int(self.player.impact_x - img_surface.get_width() // 2)
-                    pos_y = int(self.player.impact_y - img_surface.get_height() // 2)
-                    if hasattr(screen, 'surface'):
-                        screen.surface.blit(img_surface, (pos_x, pos_y))
-                    else:
-                        pygame_screen = pygame.display.get_surface()
-                        if pygame_screen:
-                            pygame_screen.blit(img_surface, (pos_x, pos_y))
-            except Exception as e:
-                # Se der erro, nao desenhar (evitar bug visual)
-                pass
+        self.projectiles.draw(screen.surface)
+        self.particles.draw(screen.surface)
         
-        # Desenhar jogador
-        if not (self.player.invincible and int(self.player.invincible_timer * 10) % 2 == 0):
-            self.draw_player(screen)
+        # Desenhar sprite de impacto se houver hit
+        if self.effects.impact_timer > 0 and self.impact_frames:
+            surface, offset_x, offset_y = self.impact_frames[self.effects.impact_facing]
+            screen.surface.blit(surface, (int(self.effects.impact_x - offset_x), int(self.effects.impact_y - offset_y)))
         
-        # HUD - Vidas (coracoes)
+        self.draw_player(screen)
+    
+    def draw_hud(self, screen):
+        """Desenha o HUD em cache, redesenhando so quando os valores mudam."""
+        if self.hud is None:
+            self.hud = Hud()
+        boss = self.boss if self.state == GameState.BOSS_ROOM and self.boss and self.boss.alive else None
+        key = (
+            self.state,
+            self.player.lives,
+            len([e for e in self.enemies if e.alive]),
+            self.current_wave,
+            self.total_waves,
+            boss.script.name if boss else None,
+        )
+        self.hud.refresh(key, lambda hud_screen: self.render_hud(hud_screen, key[2], boss))
+        if boss is not None:
+            # So as colunas da barra que mudaram
+            self.boss_bar.paint(self.hud.surface)
+        self.hud.draw(screen.surface)
+    
+    def render_hud(self, screen, alive_count, boss):
+        """Desenha o conteudo do HUD (chamado so quando ele muda)."""
+        # Vidas (coracoes)
         for i in range(self.player.lives):
             screen.draw.filled_circle((30 + i * 30, 30), 10, (220, 50, 50))
             screen.draw.circle((30 + i * 30, 30), 10, (180, 30, 30))
         
-        # HUD - Mostrar progresso das ondas (estilo Castlevania)
-        alive_count = len([e for e in self.enemies if e.alive])
+        screen.draw.text(
+            "ESC: Menu",
+            topright=(WIDTH - 20, 20),
+            fontsize=16,
+            color=(150, 150, 150)
+        )
+        
+        # Moldura da barra de vida do boss (o preenchimento e pintado a parte)
+        if boss is not None:
+            self.boss_bar.draw_frame(screen, boss.script.name)
+            return
+        
+        # Progresso das ondas (estilo Castlevania)
         screen.draw.text(
             f"Inimigos: {alive_count}",
             topleft=(20, 60),
@@ -1116,108 +3840,48 @@ class Game:
             shadow=(1, 1),
             scolor="black"
         )
-        
-        screen.draw.text(
-            "ESC: Menu",
-            topright=(WIDTH - 20, 20),
-            fontsize=16,
-            color=(150, 150, 150)
-        )
-        
     
-    def draw_clouds(self, screen):
-        """Desenha nuvens decorativas no fundo."""
-        # Nuvens simples usando circulos
-        cloud_positions = [
-            (150, 100, 40),
-            (400, 80, 50),
-            (650, 120, 45),
-            (250, 150, 35),
-            (550, 140, 40),
-        ]
-        for x, y, size in cloud_positions:
-            # Nuvem usando multiplos circulos
-            screen.draw.filled_circle((x, y), size, (255, 255, 255))
-            screen.draw.filled_circle((x + size * 0.7, y), size * 0.8, (255, 255, 255))
-            screen.draw.filled_circle((x - size * 0.7, y), size * 0.8, (255, 255, 255))
-            screen.draw.filled_circle((x, y - size * 0.5), size * 0.7, (255, 255, 255))
+    def draw_background(self, screen, scene):
+        """Desenha as camadas de parallax da cena, com a camera seguindo o jogador."""
+        if self.backgrounds is None:
+            self.build_backgrounds()
+        camera_x = self.player.x - WIDTH / 2
+        for layer in self.backgrounds[scene]:
+            if self.draw_clouds or not layer.detail:
+                layer.draw(screen.surface, camera_x, self.scene_time)
+    
+    def draw_sprite(self, screen, entity, alpha=None):
+        """Desenha o frame atual da animacao da entidade (so aritmetica inteira)."""
+        world = entity.world
+        eid = entity.eid
+        timeline = self.animation_sets[world.anim_kind[eid]].timelines[world.anim_state[eid]][world.facing[eid]]
+        surface, offset_x, offset_y = timeline[world.anim_tick[eid] % len(timeline)]
+        if alpha is None:
+            screen.surface.blit(surface, (int(world.x[eid] - offset_x), int(world.y[eid] - offset_y)))
+        else:
+            # Frames sao compartilhados: transparencia so durante este blit
+            surface.set_alpha(alpha)
+            screen.surface.blit(surface, (int(world.x[eid] - offset_x), int(world.y[eid] - offset_y)))
+            surface.set_alpha(255)
     
     def draw_player(self, screen):
-        """Desenha o jogador usando sprites."""
-        color = (80, 150, 220)  # Inicializar color antes do try
-        try:
-            if self.player_sprites is None:
-                raise Exception("Sprites nao carregados")
-            
-            # Determinar qual sprite usar com direcao
-            direction = 'r' if self.player.facing_right else 'l'
-            if self.player.is_attacking:
-                # Usar sempre hero_attack_02 (frame 0)
-                sprite_key = f'attack_0_{direction}'
-            elif self.player.is_moving:
-                sprite_key = f'walk_{self.player.current_sprite_index}_{direction}'
-            else:
-                sprite_key = f'idle_{direction}'
-            
-            img_surface = self.player_sprites[sprite_key]
-            
-            # Calcular posicao (ajustar para centralizar o sprite)
-            pos_x = int(self.player.x - img_surface.get_width() // 2)
-            pos_y = int(self.player.y - img_surface.get_height() // 2)
-            
-            # Desenhar usando o surface do screen
-            try:
-                # Tentar acessar o surface diretamente
-                if hasattr(screen, 'surface'):
-                    screen.surface.blit(img_surface, (pos_x, pos_y))
-                else:
-                    # Usar pygame.display.get_surface()
-                    pygame_screen = pygame.display.get_surface()
-                    if pygame_screen:
-                        pygame_screen.blit(img_surface, (pos_x, pos_y))
-                    else:
-                        raise AttributeError("Nao foi possivel acessar o surface")
-            except:
-                # Fallback: usar screen.blit com string (sem flip)
-                sprite_name = self.player.images_walk[self.player.current_sprite_index] if self.player.is_moving else self.player.images_idle[0]
-                screen.blit(f"images/{sprite_name}.png", (pos_x, pos_y))
-        except Exception as e:
+        """Desenha o jogador usando sprites (semitransparente piscando se invencivel)."""
+        if self.animation_sets is not None:
+            alpha = None
+            if self.player.invincible and int(self.player.invincible_timer * 10) % 2 == 0:
+                alpha = INVINCIBLE_BLINK_ALPHA
+            self.draw_sprite(screen, self.player, alpha)
+        else:
             # Fallback para desenho procedural se o sprite nao carregar
+            color = (80, 150, 220)
             screen.draw.filled_circle((int(self.player.x), int(self.player.y - 20)), 18, color)
             screen.draw.filled_rect(Rect(self.player.x - 12, self.player.y - 8, 24, 32), color)
         
     def draw_enemy(self, screen, enemy):
         """Desenha um inimigo usando sprites."""
-        try:
-            if self.enemy_sprites is None:
-                raise Exception("Sprites nao carregados")
-            
-            # Usar sprite de caminhada com direcao
-            direction = 'r' if enemy.facing_right else 'l'
-            sprite_key = f'walk_{enemy.current_sprite_index}_{direction}'
-            img_surface = self.enemy_sprites[sprite_key]
-            
-            # Calcular posicao (ajustar para centralizar o sprite)
-            pos_x = int(enemy.x - img_surface.get_width() // 2)
-            pos_y = int(enemy.y - img_surface.get_height() // 2)
-            
-            # Desenhar usando o surface do screen
-            try:
-                # Tentar acessar o surface diretamente
-                if hasattr(screen, 'surface'):
-                    screen.surface.blit(img_surface, (pos_x, pos_y))
-                else:
-                    # Usar pygame.display.get_surface()
-                    pygame_screen = pygame.display.get_surface()
-                    if pygame_screen:
-                        pygame_screen.blit(img_surface, (pos_x, pos_y))
-                    else:
-                        raise AttributeError("Nao foi possivel acessar o surface")
-            except:
-                # Fallback: usar screen.blit com string (sem flip)
-                sprite_name = enemy.images_walk[enemy.current_sprite_index]
-                screen.blit(f"images/{sprite_name}.png", (pos_x, pos_y))
-        except Exception as e:
+        if self.animation_sets is not None:
+            self.draw_sprite(screen, enemy)
+        else:
             # Fallback para desenho procedural se o sprite nao carregar
             color = (200, 80, 80)
             screen.draw.filled_circle((int(enemy.x), int(enemy.y - 15)), 20, color)
@@ -1225,8 +3889,8 @@ class Game:
     
     def draw_boss_room(self, screen):
         """Desenha a sala do boss."""
-        # Background preto simples
-        screen.fill((0, 0, 0))
+        # Fundo em camadas (salao escuro com colunas e nevoa)
+        self.draw_background(screen, GameState.BOSS_ROOM)
         
         # Desenhar plataformas flutuantes melhoradas
         for platform in self.platforms[1:]:  # Pular o chao
@@ -1246,93 +3910,28 @@ class Game:
             screen.draw.line((platform.left, platform.top), (platform.left, platform.top + 10), (100, 60, 30))
             screen.draw.line((platform.right - 1, platform.top), (platform.right - 1, platform.top + 10), (100, 60, 30))
         
+        # Cacadores chamados pelo boss
+        for enemy in self.enemies:
+            self.draw_enemy(screen, enemy)
+        
         # Desenhar boss se vivo
         if self.boss and self.boss.alive:
             self.draw_boss(screen, self.boss)
         
-        # Desenhar jogador
-        if not (self.player.invincible and int(self.player.invincible_timer * 10) % 2 == 0):
-            self.draw_player(screen)
-        
-        # Barra de vida do boss (estilo Dark Souls)
-        if self.boss and self.boss.alive:
-            self.draw_boss_health_bar(screen)
-        
-        # HUD - Vidas do jogador
-        for i in range(self.player.lives):
-            screen.draw.filled_circle((30 + i * 30, 30), 10, (220, 50, 50))
-            screen.draw.circle((30 + i * 30, 30), 10, (180, 30, 30))
-        
-        screen.draw.text(
-            "ESC: Menu",
-            topright=(WIDTH - 20, 20),
-            fontsize=16,
-            color=(150, 150, 150)
-        )
-    
-    def draw_boss_health_bar(self, screen):
-        """Desenha a barra de vida do boss estilo Dark Souls."""
-        bar_width = 400
-        bar_height = 40
-        bar_x = (WIDTH - bar_width) // 2
-        bar_y = 30
-        
-        # Background da barra (preto)
-        screen.draw.filled_rect(Rect(bar_x - 4, bar_y - 4, bar_width + 8, bar_height + 8), (0, 0, 0))
-        
-        # Barra de vida (vermelho escuro)
-        screen.draw.filled_rect(Rect(bar_x, bar_y, bar_width, bar_height), (100, 0, 0))
-        
-        # Vida atual (vermelho)
-        health_ratio = self.boss.health / self.boss.max_health
-        health_width = int(bar_width * health_ratio)
-        screen.draw.filled_rect(Rect(bar_x, bar_y, health_width, bar_height), (200, 0, 0))
-        
-        # Borda dourada
-        screen.draw.line((bar_x, bar_y), (bar_x + bar_width, bar_y), (255, 215, 0))
-        screen.draw.line((bar_x, bar_y), (bar_x, bar_y + bar_height), (255, 215, 0))
-        screen.draw.line((bar_x + bar_width, bar_y), (bar_x + bar_width, bar_y + bar_height), (255, 215, 0))
-        screen.draw.line((bar_x, bar_y + bar_height), (bar_x + bar_width, bar_y + bar_height), (255, 215, 0))
+        self.projectiles.draw(screen.surface)
+        self.particles.draw(screen.surface)
         
-        # Nome do boss
-        screen.draw.text(
-            "REI ESQUELETO",
-            center=(WIDTH // 2, bar_y + bar_height + 25),
-            fontsize=28,
-            color=(255, 215, 0),
-            shadow=(2, 2),
-            scolor="black"
-        )
+        self.draw_player(screen)
     
     def draw_boss(self, screen, boss):
         """Desenha o boss usando sprites."""
-        try:
-            if self.boss_sprites is None:
-                raise Exception("Sprites do boss nao carregados")
-            
-            # Usar sprite de caminhada com direcao
-            direction = 'r' if boss.facing_right else 'l'
-            sprite_key = f'walk_{boss.current_sprite_index}_{direction}'
-            img_surface = self.boss_sprites[sprite_key]
-            
-            # Calcular posicao
-            pos_x = int(boss.x - img_surface.get_width() // 2)
-            pos_y = int(boss.y - img_surface.get_height() // 2)
-            
-            # Desenhar usando o surface do screen
-            try:
-                if hasattr(screen, 'surface'):
-                    screen.surface.blit(img_surface, (pos_x, pos_y))
-                else:
-                    pygame_screen = pygame.display.get_surface()
-                    if pygame_screen:
-                        pygame_screen.blit(img_surface, (pos_x, pos_y))
-                    else:
-                        raise AttributeError("Nao foi possivel acessar o surface")
-            except:
-                sprite_name = boss.images_walk[boss.current_sprite_index]
-                screen.blit(f"images/{sprite_name}.png", (pos_x, pos_y))
-        except Exception as e:
+        # Aviso de ataque: brilho vermelho piscando atras do boss
+        if boss.telegraph and (pygame.time.get_ticks() // 100) % 2 == 0:
+            screen.draw.filled_circle((int(boss.x), int(boss.y - 10)), 40, (120, 0, 0))
+            screen.draw.circle((int(boss.x), int(boss.y - 10)), 42, (255, 60, 60))
+        if self.animation_sets is not None:
+            self.draw_sprite(screen, boss)
+        else:
             # Fallback para desenho procedural
             color = (150, 50, 50)
             screen.draw.filled_circle((int(boss.x), int(boss.y - 15)), 25, color)
@@ -1383,47 +3982,98 @@ def resource_path(relative_path):
         return os.path.join(sys._MEIPASS, relative_path)
     return os.path.join(relative_path)
 
-# Instancia global do jogo
-game = Game()
+# Ampliacao da tela logica para a janela: pixels duros ou suavizados
+os.environ.setdefault("SDL_RENDER_SCALE_QUALITY", "1" if SMOOTH_SCALE else "0")
+
+# Instancia global do jogo (criada no primeiro frame, nao na importacao)
+game = None
+
+
+def setup_window():
+    """Janela redimensionavel: o SDL amplia a tela logica (WIDTH x HEIGHT)."""
+    flags = pygame.SCALED | pygame.RESIZABLE | (pygame.FULLSCREEN if FULLSCREEN else 0)
+    try:
+        screen.surface = pygame.display.set_mode((WIDTH, HEIGHT), flags)
+    except pygame.error as e:
+        # Sem renderizador (drivers antigos ou dummy): janela fixa de sempre
+        print(f"Janela redimensionavel indisponivel: {e}")
+        screen.surface = pygame.display.set_mode((WIDTH, HEIGHT))
+
+
+def get_game():
+    """Retorna a instancia global do jogo, criando-a se necessario."""
+    global game
+    if game is None:
+        setup_window()
+        game = Game()
+        if BOT_POLICY in BOT_POLICIES:
+            game.controller = BotController(BOT_POLICIES[BOT_POLICY], autoplay=True)
+        elif BOT_POLICY:
+            print(f"ELDEN_BOT desconhecido: {BOT_POLICY!r} (use {', '.join(sorted(BOT_POLICIES))}); jogando pelo teclado")
+    return game
 
 
 def update():
     """Funcao de atualizacao chamada pelo PgZero."""
     dt = 1/60
+    game = get_game()
+    game.poll_focus()
+    timeout = game.idle_timeout()
+    if timeout:
+        wait_for_input(timeout)
+    game.frame_start = time.perf_counter()
     game.update(dt, keyboard)
 
 
+def wait_for_input(timeout):
+    """Dorme ate chegar um evento (ou acabar o tempo) em vez de girar o loop."""
+    event = pygame.event.wait(int(timeout * 1000))
+    if event.type != pygame.NOEVENT:
+        pygame.event.post(event)  # O PgZero trata o evento no proximo frame
+
+
 def draw():
     """Funcao de desenho chamada pelo PgZero."""
-    # Fixar tamanho da janela (chamar sempre para garantir)
-    try:
-        pygame_screen = pygame.display.get_surface()
-        if pygame_screen:
-            current_size = pygame_screen.get_size()
-            if current_size != (WIDTH, HEIGHT):
-                pygame.display.set_mode((WIDTH, HEIGHT))
-    except:
-        pass
+    # A janela pode mudar de tamanho: o SDL amplia a tela logica (WIDTH x HEIGHT)
+    if not get_game().should_draw():
+        return  # Tela parada: o frame anterior continua na janela
     game.draw(screen)
+    if game.recorder is not None:
+        game.recorder.capture(screen.surface)
+    game.frame_drawn()
 
 
 def on_mouse_down(pos):
     """Evento de clique do mouse."""
-    game.handle_click(pos)
+    get_game().handle_click(pos)
 
 
 def on_mouse_move(pos):
     """Evento de movimento do mouse."""
-    game.handle_mouse_move(pos)
+    get_game().handle_mouse_move(pos)
 
 
 def on_key_down(key):
     """Evento de tecla pressionada."""
-    if key == keys.ESCAPE:
+    game = get_game()
+    game.needs_redraw = True
+    if key == keys.P:
+        if game.state == GameState.PLAYING or game.state == GameState.BOSS_ROOM:
+            game.set_paused(not game.paused)
+    elif key == keys.ESCAPE:
         if game.state == GameState.PLAYING or game.state == GameState.BOSS_ROOM:
             game.state = GameState.MENU
             game.stop_music()
     elif key == keys.X:
         # Tecla X para atacar
-        if game.state == GameState.PLAYING or game.state == GameState.BOSS_ROOM:
+        if (game.state == GameState.PLAYING or game.state == GameState.BOSS_ROOM) and not game.paused:
             game.player.attack()
+    elif key == keys.C:
+        # Tecla C para atirar
+        if (game.state == GameState.PLAYING or game.state == GameState.BOSS_ROOM) and not game.paused:
+            game.player_shoot()
+    elif key == keys.F11:
+        try:
+            pygame.display.toggle_fullscreen()
+        except pygame.error as e:
+            print(f"Tela cheia indisponivel: {e}")
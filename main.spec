@@ -5,7 +5,7 @@ a = Analysis(
     ['main.py'],
     pathex=[],
     binaries=[],
-    datas=[('images', 'images'), ('music', 'music')],
+    datas=[('images', 'images'), ('music', 'music'), ('bosses', 'bosses')],
     hiddenimports=[],
     hookspath=[],
     hooksconfig={},
@@ -16,19 +16,17 @@ a = Analysis(
 )
 pyz = PYZ(a.pure)
 
+# Modo pasta (onedir): evita descompactar o bundle inteiro a cada inicializacao
 exe = EXE(
     pyz,
     a.scripts,
-    a.binaries,
-    a.datas,
     [],
+    exclude_binaries=True,
     name='main',
     debug=False,
     bootloader_ignore_signals=False,
     strip=False,
-    upx=True,
-    upx_exclude=[],
-    runtime_tmpdir=None,
+    upx=False,
     console=False,
     disable_windowed_traceback=False,
     argv_emulation=False,
@@ -36,3 +34,12 @@ exe = EXE(
     codesign_identity=None,
     entitlements_file=None,
 )
+coll = COLLECT(
+    exe,
+    a.binaries,
+    a.datas,
+    strip=False,
+    upx=False,
+    upx_exclude=[],
+    name='main',
+)
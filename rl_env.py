@@ -0,0 +1,412 @@
+# -*- coding: utf-8 -*-
+"""
+Ambiente de treino - Elden Thing
+Interface no estilo Gym para treinar agentes contra o jogo, sem janela.
+
+    env = EldenEnv(seed=0)
+    obs, info = env.reset()
+    obs, reward, terminated, truncated, info = env.step(ACTION_RIGHT)
+
+VecEldenEnv roda N partidas em passo unico (lockstep) e devolve as
+observacoes em um array (N, OBS_SIZE). PixelEldenEnv observa a tela
+desenhada (array de pixels) em vez do vetor. Para medir a vazao:
+
+    python rl_env.py --envs 64 --steps 20000
+    python rl_env.py --envs 8 --pixels 84x84 --gray
+    python rl_env.py --check   # confere recompensa por morte, tiros do boss e cacadores
+"""
+
+import os
+import time
+import argparse
+
+import numpy as np
+import pygame
+
+# Sem janela e sem audio
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+import main
+
+DT = 1 / 60
+DEFAULT_MAX_STEPS = 60 * 60 * 5  # Cinco minutos de jogo
+
+# Acoes discretas -> teclas seguradas (left, right, up, x, c)
+ACTIONS = (
+    (False, False, False, False, False),  # Parado
+    (True, False, False, False, False),   # Esquerda
+    (False, True, False, False, False),   # Direita
+    (False, False, True, False, False),   # Pular
+    (True, False, True, False, False),    # Pular para a esquerda
+    (False, True, True, False, False),    # Pular para a direita
+    (False, False, False, True, False),   # Atacar
+    (False, False, False, False, True),   # Atirar
+)
+ACTION_NOOP, ACTION_LEFT, ACTION_RIGHT, ACTION_JUMP, ACTION_JUMP_LEFT, ACTION_JUMP_RIGHT, ACTION_ATTACK, ACTION_SHOOT = range(len(ACTIONS))
+
+# Layout da observacao (float32, posicoes normalizadas pela tela)
+MAX_ENEMIES = 3  # Uma vaga por onda
+PLAYER_FIELDS = 9  # x, y, vx, vy, direcao, no chao, vidas, sala do boss, porta aberta
+ENEMY_FIELDS = 3  # dx, dy, vivo
+BOSS_FIELDS = 5  # dx, dy, vivo, vida, avisando
+OBS_SIZE = PLAYER_FIELDS + MAX_ENEMIES * ENEMY_FIELDS + BOSS_FIELDS
+
+# Recompensas
+REWARD_KILL = 1.0
+REWARD_BOSS_DAMAGE = 0.1  # Por ponto de vida tirado do boss
+REWARD_BOSS_ROOM = 1.0
+REWARD_VICTORY = 10.0
+REWARD_LIFE_LOST = -1.0
+REWARD_GAME_OVER = -5.0
+
+
+class EldenEnv:
+    """Uma partida sem janela controlada por acoes discretas.
+
+    reset() comeca uma partida nova (Game.start_game -> reset_game) e step()
+    segura as teclas da acao por frame_skip ticks. O ataque e o tiro valem
+    na borda de descida, como no teclado: segurar ACTION_ATTACK ataca uma vez.
+    """
+
+    action_count = len(ACTIONS)
+    observation_size = OBS_SIZE
+
+    def __init__(self, seed=None, frame_skip=1, max_steps=DEFAULT_MAX_STEPS):
+        self.seed = seed
+        self.frame_skip = max(1, frame_skip)
+        self.max_steps = max_steps
+        self.action = ACTION_NOOP
+        self.game = main.Game(headless=True)
+        self.game.controller = main.BotController(self.press_action, seed=seed)
+        self.steps = 0
+        self.last = None  # (inimigos mortos, vida do boss, vidas, sala do boss)
+
+    def press_action(self, game, keyboard, rng):
+        """Politica do BotController: aperta as teclas da acao atual."""
+        keyboard.left, keyboard.right, keyboard.up, keyboard.x, keyboard.c = ACTIONS[self.action]
+
+    def reset(self, seed=None):
+        """Comeca uma partida nova; retorna (observacao, info)."""
+        if seed is not None:
+            self.seed = seed
+        self.game.start_game()
+        if self.seed is not None:
+            # A simulacao nao sorteia nada; os unicos geradores sao o do controlador e o das particulas
+            self.game.controller.rng.seed(self.seed)
+            self.game.particles.rng = np.random.default_rng(self.seed)
+            self.seed += 1  # Proxima partida com outra seed
+        self.game.controller.keyboard.clear()
+        self.steps = 0
+        self.last = self.progress()
+        obs = np.zeros(OBS_SIZE, dtype=np.float32)
+        self.observe(obs)
+        return obs, {}
+
+    def step(self, action, out=None):
+        """Aplica a acao; retorna (observacao, recompensa, terminou, truncou, info).
+
+        out (opcional) e o array onde escrever a observacao, para nao alocar.
+        """
+        game = self.game
+        self.action = action
+        for _ in range(self.frame_skip):
+            game.update(DT, None)
+            if game.state not in (main.GameState.PLAYING, main.GameState.BOSS_ROOM):
+                break
+        self.steps += 1
+
+        progress = self.progress()
+        kills, boss_health, lives, boss_room = progress
+        last_kills, last_boss_health, last_lives, last_boss_room = self.last
+        self.last = progress
+        reward = (kills - last_kills) * REWARD_KILL
+        reward += (last_lives - lives) * REWARD_LIFE_LOST
+        if boss_room and not last_boss_room:
+            reward += REWARD_BOSS_ROOM
+        elif boss_room:
+            reward += (last_boss_health - boss_health) * REWARD_BOSS_DAMAGE
+        terminated = game.state in (main.GameState.VICTORY, main.GameState.GAME_OVER)
+        if game.state == main.GameState.VICTORY:
+            reward += REWARD_VICTORY
+        elif game.state == main.GameState.GAME_OVER:
+            reward += REWARD_GAME_OVER
+        truncated = not terminated and self.steps >= self.max_steps
+
+        obs = out if out is not None else np.zeros(OBS_SIZE, dtype=np.float32)
+        self.observe(obs)
+        return obs, reward, terminated, truncated, {"state": game.state}
+
+    def progress(self):
+        """Contadores usados na recompensa.
+
+        Os mortos vem das estatisticas de eventos: game.enemies perde os
+        inimigos no mesmo tick em que morrem.
+        """
+        game = self.game
+        kills = game.stats.counts.get(main.GameEvent.DEATH, 0)
+        boss_health = game.boss.health if game.boss else 0
+        return kills, boss_health, max(0, game.player.lives), game.boss is not None
+
+    def observe(self, obs):
+        """Escreve a observacao atual em obs (array float32 de OBS_SIZE)."""
+        game = self.game
+        world = game.world
+        player = game.player
+        eid = player.eid
+        px = world.x[eid]
+        py = world.y[eid]
+        obs[:] = 0.0
+        obs[0] = px / main.WIDTH
+        obs[1] = py / main.HEIGHT
+        obs[2] = world.vx[eid] / 10
+        obs[3] = world.vy[eid] / 20
+        obs[4] = 1.0 if world.facing[eid] else -1.0
+        obs[5] = player.on_ground
+        obs[6] = max(0, player.lives) / 3
+        obs[7] = game.boss is not None
+        obs[8] = not game.exit_locked
+
+        i = PLAYER_FIELDS
+        for enemy in game.enemies[:MAX_ENEMIES]:
+            if enemy.alive:
+                obs[i] = (enemy.x - px) / main.WIDTH
+                obs[i + 1] = (enemy.y - py) / main.HEIGHT
+                obs[i + 2] = 1.0
+            i += ENEMY_FIELDS
+
+        boss = game.boss
+        i = PLAYER_FIELDS + MAX_ENEMIES * ENEMY_FIELDS
+        if boss is not None and boss.alive:
+            obs[i] = (boss.x - px) / main.WIDTH
+            obs[i + 1] = (boss.y - py) / main.HEIGHT
+            obs[i + 2] = 1.0
+            obs[i + 3] = boss.health / boss.max_health
+            obs[i + 4] = boss.telegraph
+
+
+class PixelObserver:
+    """Desenha Game.draw fora da tela e expoe os pixels como array NumPy sem copia.
+
+    Os pixels observados vivem num Surface criado sobre um buffer NumPy
+    (pygame.image.frombuffer), entao o array (altura, largura, 3) em RGB
+    aponta direto para a memoria do Surface. Com size, a tela e desenhada num
+    Surface comum (blits mais rapidos) e reduzida com transform.scale para o
+    Surface observado; com grayscale, vira um array (altura, largura) de um
+    canal. O array retornado e sempre o mesmo e e sobrescrito a cada
+    render(): copie se precisar guardar o frame.
+    """
+
+    def __init__(self, game, size=None, grayscale=False, sprites=True):
+        pygame.init()
+        if pygame.display.get_surface() is None:
+            pygame.display.set_mode((1, 1))  # convert_alpha dos sprites precisa de um modo de video
+        self.game = game
+        if sprites and game.animation_sets is None:
+            game.load_sprites()
+        self.size = tuple(size) if size else (main.WIDTH, main.HEIGHT)
+        self.grayscale = grayscale
+        # Mesma ordem de bytes da tela: os sprites convertidos copiam sem conversao
+        self.byte_order = "BGRA" if pygame.display.get_surface().get_masks()[0] == 0xFF0000 else "RGBA"
+        self.buffer, self.output = self.make_surface(self.size)
+        if self.size == (main.WIDTH, main.HEIGHT) and not grayscale:
+            self.canvas = self.output  # Desenha direto no Surface observado
+        else:
+            self.canvas = pygame.Surface((main.WIDTH, main.HEIGHT))
+        self.screen = main.Screen(self.canvas)
+        if grayscale:
+            self.pixels = self.buffer[:, :, 0]
+        elif self.byte_order == "BGRA":
+            self.pixels = self.buffer[:, :, 2::-1]
+        else:
+            self.pixels = self.buffer[:, :, :3]
+
+    def make_surface(self, size):
+        """Surface cujos pixels vivem em um array (altura, largura, 4)."""
+        width, height = size
+        buffer = np.zeros((height, width, 4), dtype=np.uint8)
+        return buffer, pygame.image.frombuffer(buffer, size, self.byte_order)
+
+    def render(self):
+        """Desenha o frame atual e retorna o array de pixels (sem copia)."""
+        self.game.draw(self.screen)
+        if self.canvas is not self.output:
+            if self.size == (main.WIDTH, main.HEIGHT):
+                pygame.transform.grayscale(self.canvas, self.output)
+            else:
+                pygame.transform.scale(self.canvas, self.size, self.output)
+                if self.grayscale:
+                    # Depois de reduzir: converter a tela inteira seria mais caro
+                    pygame.transform.grayscale(self.output, self.output)
+        return self.pixels
+
+
+class PixelEldenEnv(EldenEnv):
+    """EldenEnv que observa os pixels da tela (ver PixelObserver).
+
+    A tela so e desenhada uma vez por passo, depois dos frame_skip ticks.
+    """
+
+    def __init__(self, seed=None, frame_skip=4, max_steps=DEFAULT_MAX_STEPS, size=(84, 84), grayscale=True, sprites=True):
+        super().__init__(seed, frame_skip, max_steps)
+        self.observer = PixelObserver(self.game, size, grayscale, sprites)
+        self.state_vector = np.zeros(OBS_SIZE, dtype=np.float32)  # Vetor de estado, so para nao alocar
+
+    def reset(self, seed=None):
+        super().reset(seed)
+        return self.observer.render(), {}
+
+    def step(self, action, out=None):
+        _, reward, terminated, truncated, info = super().step(action, self.state_vector)
+        return self.observer.render(), reward, terminated, truncated, info
+
+
+class VecEldenEnv:
+    """N partidas em lockstep com observacoes em lote.
+
+    step(actions) devolve arrays (N, OBS_SIZE), (N,), (N,), (N,). Partidas que
+    terminam sao recomecadas na hora; a ultima observacao delas fica em
+    infos[i]["final_observation"]. A simulacao nao sorteia nada: com as mesmas
+    acoes cada partida se repete, e a seed de cada uma so fixa os geradores do
+    controlador e das particulas.
+
+    Com pixels=(largura, altura), cada partida e um PixelEldenEnv e as
+    observacoes ficam em um array uint8 (N, altura, largura[, 3]).
+    """
+
+    def __init__(self, count, seed=0, frame_skip=1, max_steps=DEFAULT_MAX_STEPS, pixels=None, grayscale=False):
+        if pixels:
+            self.envs = [PixelEldenEnv(seed + i * 100003, frame_skip, max_steps, pixels, grayscale) for i in range(count)]
+            shape, dtype = self.envs[0].observer.pixels.shape, np.uint8
+        else:
+            self.envs = [EldenEnv(seed + i * 100003, frame_skip, max_steps) for i in range(count)]
+            shape, dtype = (OBS_SIZE,), np.float32
+        self.count = count
+        self.action_count = len(ACTIONS)
+        self.observations = np.zeros((count, *shape), dtype=dtype)
+        self.rewards = np.zeros(count, dtype=np.float32)
+        self.terminated = np.zeros(count, dtype=bool)
+        self.truncated = np.zeros(count, dtype=bool)
+
+    def reset(self):
+        """Recomeca todas as partidas; retorna (observacoes, infos)."""
+        for i, env in enumerate(self.envs):
+            self.observations[i] = env.reset()[0]
+        return self.observations, [{} for _ in self.envs]
+
+    def step(self, actions):
+        """Um passo em cada partida. Os arrays retornados sao reaproveitados."""
+        infos = []
+        observations = self.observations
+        for i, env in enumerate(self.envs):
+            obs, reward, terminated, truncated, info = env.step(int(actions[i]), out=observations[i])
+            if obs is not observations[i]:
+                observations[i] = obs  # Pixels: uma copia por partida para montar o lote
+            if terminated or truncated:
+                info["final_observation"] = observations[i].copy()
+                observations[i] = env.reset()[0]
+            self.rewards[i] = reward
+            self.terminated[i] = terminated
+            self.truncated[i] = truncated
+            infos.append(info)
+        return observations, self.rewards, self.terminated, self.truncated, infos
+
+
+def check_kill_reward(max_steps=3000):
+    """Anda para a direita atacando; confere que cada inimigo morto paga recompensa.
+
+    Retorna (mortes, recompensa total); AssertionError se alguma morte nao pagou.
+    """
+    env = EldenEnv(seed=0)
+    env.reset()
+    total = 0.0
+    for i in range(max_steps):
+        kills = env.progress()[0]
+        _, reward, terminated, truncated, _ = env.step(ACTION_ATTACK if i % 2 else ACTION_RIGHT)
+        total += reward
+        if env.progress()[0] > kills:
+            assert reward > 0, f"inimigo morto sem recompensa no passo {i} (recompensa {reward})"
+        if terminated or truncated:
+            break
+    kills = env.progress()[0]
+    assert kills > 0, "nenhum inimigo morto"
+    return kills, total
+
+
+def check_boss_volley(count=5):
+    """Confere que um leque de tiros do boss sobrevive ao primeiro tick.
+
+    Retorna quantos tiros continuam vivos; AssertionError se algum sumiu.
+    """
+    env = EldenEnv(seed=0)
+    env.reset()
+    game = env.game
+    game.enter_boss_room()
+    for _ in range(30):  # Boss e jogador pousados
+        env.step(ACTION_NOOP)
+    game.projectiles.clear()
+    main.script_shoot(game.world, game.boss.eid, game.player, count, 30, 4)
+    game.update_projectiles(DT)
+    alive = len(game.projectiles)
+    assert alive == count, f"{count - alive} de {count} tiros do boss sumiram no primeiro tick"
+    return alive
+
+
+def check_reinforcements(ticks=10):
+    """Confere que os cacadores chamados pelo boss pousam nas proprias plataformas.
+
+    Retorna quantos pousaram; AssertionError se algum caiu direto.
+    """
+    env = EldenEnv(seed=0)
+    env.reset()
+    game = env.game
+    game.enter_boss_room()
+    game.call_reinforcements()
+    world = game.world
+    spawned = [(hunter, hunter.y + world.foot[hunter.eid]) for hunter in game.enemies]
+    for _ in range(ticks):
+        world.run(DT, game.player)
+    for hunter, top in spawned:
+        feet = hunter.y + world.foot[hunter.eid]
+        assert world.grounded[hunter.eid] and feet == top, f"cacador caiu de y={top} para y={feet}"
+    return len(spawned)
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description="Mede a vazao do ambiente de treino do Elden Thing")
+    parser.add_argument("--envs", type=int, default=16, help="partidas em lockstep")
+    parser.add_argument("--steps", type=int, default=5000, help="passos do lote")
+    parser.add_argument("--frame-skip", type=int, default=1, help="ticks por passo")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--pixels", help="observar a tela nesta resolucao (ex.: 84x84)")
+    parser.add_argument("--gray", action="store_true", help="pixels em tons de cinza")
+    parser.add_argument("--check", action="store_true", help="so confere a recompensa por inimigo morto, os tiros do boss e os cacadores")
+    args = parser.parse_args()
+
+    if args.check:
+        kills, total = check_kill_reward()
+        print(f"ok: {kills} inimigos mortos, recompensa total {total:.1f}")
+        print(f"ok: {check_boss_volley()} tiros do boss vivos depois do primeiro tick")
+        print(f"ok: {check_reinforcements()} cacadores pousados nas plataformas altas")
+        return
+
+    pixels = tuple(int(v) for v in args.pixels.lower().split("x")) if args.pixels else None
+    env = VecEldenEnv(args.envs, seed=args.seed, frame_skip=args.frame_skip, pixels=pixels, grayscale=args.gray)
+    rng = np.random.default_rng(args.seed)
+    env.reset()
+    episodes = 0
+    total_reward = 0.0
+    start = time.perf_counter()
+    for _ in range(args.steps):
+        _, rewards, terminated, truncated, _ = env.step(rng.integers(0, env.action_count, args.envs))
+        episodes += int(np.count_nonzero(terminated | truncated))
+        total_reward += float(rewards.sum())
+    elapsed = time.perf_counter() - start
+    env_steps = args.steps * args.envs
+    print(f"{env_steps} passos em {elapsed:.1f} s ({env_steps / elapsed:.0f} passos/s, "
+          f"{env_steps * env.envs[0].frame_skip / elapsed:.0f} ticks/s)")
+    print(f"{episodes} partidas terminadas, recompensa media por passo {total_reward / env_steps:.4f}")
+
+
+if __name__ == "__main__":
+    main_cli()
@@ -0,0 +1,196 @@
+# -*- coding: utf-8 -*-
+"""
+Simulador em lote - Elden Thing
+Roda muitas partidas sem janela, em paralelo, com jogadores automaticos,
+para balancear as ondas e o boss.
+
+Para executar:
+    python simulate.py --runs 200 --policy scripted
+    python simulate.py --param ENEMY_SPEED=2,3 --param BOSS_MAX_HEALTH=100,150 --csv resultados.csv
+
+Cada --param recebe uma lista de valores; todas as combinacoes sao simuladas.
+"""
+
+import os
+import csv
+import time
+import argparse
+import itertools
+import statistics
+from multiprocessing import Pool
+
+# Sem janela e sem audio nos processos de simulacao
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+import main
+
+DT = 1 / 60
+DEFAULT_MAX_SECONDS = 300  # Partidas mais longas contam como tempo esgotado
+TUNABLE_PARAMS = ("ENEMY_SPEED", "ATTACK_RANGE", "BOSS_ATTACK_COOLDOWN", "BOSS_MAX_HEALTH")
+
+# Valores originais, restaurados antes de cada partida no processo trabalhador
+DEFAULTS = {name: getattr(main, name) for name in TUNABLE_PARAMS}
+
+
+def run_game(task):
+    """Roda uma partida completa e retorna as metricas."""
+    params, seed, policy_name, max_seconds = task
+    for name, value in DEFAULTS.items():
+        setattr(main, name, value)
+    for name, value in params:
+        setattr(main, name, value)
+
+    game = main.Game(headless=True)
+    game.controller = main.BotController(main.BOT_POLICIES[policy_name], seed=seed)
+    game.start_game()
+    start_lives = game.player.lives
+    boss_room_tick = None
+    ticks = 0
+    max_ticks = int(max_seconds / DT)
+    while ticks < max_ticks and game.state in (main.GameState.PLAYING, main.GameState.BOSS_ROOM):
+        game.update(DT, None)
+        ticks += 1
+        if boss_room_tick is None and game.state == main.GameState.BOSS_ROOM:
+            boss_room_tick = ticks
+
+    if game.state == main.GameState.VICTORY:
+        outcome = "victory"
+    elif game.state == main.GameState.GAME_OVER:
+        outcome = "game_over"
+    else:
+        outcome = "timeout"
+    time_to_kill = None
+    if outcome == "victory" and boss_room_tick is not None:
+        time_to_kill = (ticks - boss_room_tick) * DT
+    return {
+        "params": params,
+        "seed": seed,
+        "outcome": outcome,
+        "game_time": ticks * DT,
+        "waves_time": boss_room_tick * DT if boss_room_tick is not None else None,
+        "time_to_kill": time_to_kill,
+        "damage_taken": start_lives - max(0, game.player.lives),
+        "boss_health": game.boss.health if game.boss else None,
+    }
+
+
+def parse_param(text):
+    """Converte 'NOME=v1,v2' em (nome, [valores])."""
+    name, _, values = text.partition("=")
+    name = name.strip().upper()
+    if name not in TUNABLE_PARAMS:
+        raise argparse.ArgumentTypeError(f"parametro desconhecido: {name} (use {', '.join(TUNABLE_PARAMS)})")
+    kind = type(DEFAULTS[name])
+    try:
+        numbers = [float(v) for v in values.split(",") if v.strip()]
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"valores invalidos para {name}: {values}")
+    # Parametros inteiros nao aceitam fracao (seria truncada sem aviso)
+    if kind is int and not all(v.is_integer() for v in numbers):
+        raise argparse.ArgumentTypeError(f"{name} so aceita inteiros: {values}")
+    parsed = [kind(v) for v in numbers]
+    if not parsed:
+        raise argparse.ArgumentTypeError(f"nenhum valor para {name}")
+    return name, parsed
+
+
+def build_tasks(param_grid, runs, base_seed, policy, max_seconds):
+    """Uma tarefa por (combinacao de parametros, seed)."""
+    names = [name for name, _ in param_grid]
+    combos = list(itertools.product(*[values for _, values in param_grid])) or [()]
+    tasks = []
+    for combo in combos:
+        params = tuple(zip(names, combo))
+        for i in range(runs):
+            tasks.append((params, base_seed + i, policy, max_seconds))
+    return tasks
+
+
+def mean_or_none(values):
+    """Media ignorando valores ausentes."""
+    values = [v for v in values if v is not None]
+    return statistics.mean(values) if values else None
+
+
+def summarize(results):
+    """Agrupa os resultados por combinacao de parametros."""
+    groups = {}
+    for result in results:
+        groups.setdefault(result["params"], []).append(result)
+    rows = []
+    for params, group in sorted(groups.items()):
+        wins = [r for r in group if r["outcome"] == "victory"]
+        rows.append({
+            "params": ", ".join(f"{name}={value}" for name, value in params) or "(padrao)",
+            "runs": len(group),
+            "win_rate": len(wins) / len(group),
+            "timeouts": sum(1 for r in group if r["outcome"] == "timeout"),
+            "time_to_kill": mean_or_none([r["time_to_kill"] for r in wins]),
+            "waves_time": mean_or_none([r["waves_time"] for r in group]),
+            "damage_taken": mean_or_none([r["damage_taken"] for r in group]),
+        })
+    return rows
+
+
+def format_table(rows):
+    """Monta a tabela de resultados em texto."""
+    def fmt(value, spec):
+        return "-" if value is None else format(value, spec)
+
+    header = f"{'parametros':<40} {'partidas':>8} {'vitorias':>8} {'timeout':>7} {'t. boss (s)':>11} {'t. ondas (s)':>12} {'dano':>5}"
+    lines = [header, "-" * len(header)]
+    for row in rows:
+        lines.append(
+            f"{row['params']:<40} {row['runs']:>8} {row['win_rate']:>8.1%} {row['timeouts']:>7} "
+            f"{fmt(row['time_to_kill'], '.1f'):>11} {fmt(row['waves_time'], '.1f'):>12} {fmt(row['damage_taken'], '.2f'):>5}"
+        )
+    return "\n".join(lines)
+
+
+def write_csv(path, results):
+    """Grava uma linha por partida."""
+    fields = ["params", "seed", "outcome", "game_time", "waves_time", "time_to_kill", "damage_taken", "boss_health"]
+    with open(path, "w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=fields)
+        writer.writeheader()
+        for result in results:
+            row = dict(result)
+            row["params"] = ";".join(f"{name}={value}" for name, value in result["params"])
+            writer.writerow(row)
+
+
+def run_batch(tasks, workers):
+    """Distribui as partidas entre os processos e junta os resultados."""
+    if workers == 1:
+        return [run_game(task) for task in tasks]
+    # Blocos pequenos mantem todos os nucleos ocupados ate o fim do lote
+    chunksize = max(1, len(tasks) // (workers * 8))
+    with Pool(processes=workers) as pool:
+        return list(pool.imap_unordered(run_game, tasks, chunksize=chunksize))
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description="Simulador em lote do Elden Thing")
+    parser.add_argument("--runs", type=int, default=100, help="partidas por combinacao de parametros")
+    parser.add_argument("--param", type=parse_param, action="append", default=[], help="NOME=v1,v2,...")
+    parser.add_argument("--policy", choices=sorted(main.BOT_POLICIES), default="scripted")
+    parser.add_argument("--seed", type=int, default=0, help="seed da primeira partida")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="processos (padrao: todos os nucleos)")
+    parser.add_argument("--max-seconds", type=float, default=DEFAULT_MAX_SECONDS, help="tempo de jogo maximo por partida")
+    parser.add_argument("--csv", help="grava os resultados de cada partida neste arquivo")
+    args = parser.parse_args()
+
+    tasks = build_tasks(args.param, args.runs, args.seed, args.policy, args.max_seconds)
+    start = time.perf_counter()
+    results = run_batch(tasks, max(1, args.workers))
+    elapsed = time.perf_counter() - start
+
+    print(format_table(summarize(results)))
+    print(f"\n{len(results)} partidas em {elapsed:.1f} s com {args.workers} processos ({len(results) / elapsed:.1f} partidas/s)")
+    if args.csv:
+        write_csv(args.csv, results)
+
+
+if __name__ == "__main__":
+    main_cli()